@@ -0,0 +1,54 @@
+import time
+import tkinter as tk
+
+
+class AnimationClock:
+    """App-wide frame clock that only ticks while something is animating
+
+    Animatables implement tick(dt) and return True while they still need frames.
+    """
+
+    def __init__(self, root, frame_ms=16):
+        self.root = root
+        self.frame_ms = frame_ms
+        self._active = set()
+        self._after_id = None
+        self._last_tick = None
+
+    @property
+    def idle(self):
+        return self._after_id is None
+
+    def add(self, animatable):
+        """Start animating; must be called on the main thread"""
+        self._active.add(animatable)
+        if self._after_id is None:
+            self._last_tick = time.monotonic()
+            self._after_id = self.root.after(self.frame_ms, self._tick)
+
+    def remove(self, animatable):
+        self._active.discard(animatable)
+        if not self._active and self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        now = time.monotonic()
+        dt = now - self._last_tick
+        self._last_tick = now
+
+        for animatable in list(self._active):
+            try:
+                moving = animatable.tick(dt)
+            except tk.TclError:
+                moving = False
+            if not moving:
+                self._active.discard(animatable)
+
+        # Sleep entirely once nothing is moving
+        if self._active:
+            self._after_id = self.root.after(self.frame_ms, self._tick)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Luna FPS anomaly detector
+Streaming detection of frame-time spikes, FPS drops, ping jitter and CPU/RAM
+saturation over monitor samples, the Auto Boost policy built on it, and a
+synthetic trace replay that measures detection accuracy and latency.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from latency_prober import summarize
+
+# Tasks that address each kind of anomaly (only ones that actually change
+# something, see optimization_tasks.PLACEHOLDER_TASKS)
+ANOMALY_TASKS = {
+    'frametime_spike': ('cpu', 'gamemode'),
+    'fps_drop': ('cpu',),
+    # Background downloads/updaters also hit the disk; Game Mode demotes them
+    'ping_jitter': ('gamemode',),
+    'cpu_saturation': ('cpu',),
+    'ram_saturation': ('ram',)
+}
+
+ANOMALY_LABELS = {
+    'frametime_spike': "skoki czasu klatki",
+    'fps_drop': "spadek FPS",
+    'ping_jitter': "niestabilny ping",
+    'cpu_saturation': "przeciążony CPU",
+    'ram_saturation': "brak pamięci"
+}
+
+# Don't run the same task again within this many seconds
+DEFAULT_COOLDOWN = 120.0
+
+# RTTs per endpoint window in LatencyProber, used by the synthetic trace
+PROBE_WINDOW = 30
+
+
+class EwmaBaseline:
+    """Exponentially weighted mean and mean absolute deviation, O(1) per update"""
+
+    def __init__(self, alpha=0.05):
+        self.alpha = alpha
+        self.mean = None
+        self.dev = 0.0
+        self.count = 0
+
+    def update(self, value, alpha=None):
+        alpha = self.alpha if alpha is None else alpha
+        self.count += 1
+        if self.mean is None:
+            self.mean = value
+            return
+        diff = value - self.mean
+        self.mean += alpha * diff
+        self.dev += alpha * (abs(diff) - self.dev)
+
+
+class DeviationCheck:
+    """Flags values far from their EWMA baseline in one direction
+
+    'on' needs both k_on deviations and a min_change relative change (so
+    tiny-noise signals don't alert on tiny moves); 'off' is below k_off.
+    Anomalous values feed the baseline 10x slower, so a lasting shift is
+    absorbed eventually without a spike dragging the baseline along.
+    """
+
+    def __init__(self, direction=1, k_on=4.0, k_off=2.0, min_change=0.3, alpha=0.05, warmup=20):
+        self.direction = direction
+        self.k_on = k_on
+        self.k_off = k_off
+        self.min_change = min_change
+        self.baseline = EwmaBaseline(alpha)
+        self.warmup = warmup
+
+    def check(self, value):
+        base = self.baseline
+        if base.count < self.warmup:
+            base.update(value)
+            return None
+        # Floor the scale so a perfectly flat signal can't make noise look huge
+        scale = max(base.dev, abs(base.mean) * 0.01, 1e-6)
+        score = self.direction * (value - base.mean) / scale
+        change = self.direction * (value - base.mean) / abs(base.mean) if base.mean else 0.0
+        if score >= self.k_on and change >= self.min_change:
+            base.update(value, base.alpha / 10)
+            return 'on'
+        base.update(value)
+        return 'off' if score < self.k_off else None
+
+
+class ThresholdCheck:
+    """Fixed on/off thresholds (the gap between them is the hysteresis band)"""
+
+    def __init__(self, on, off):
+        self.on = on
+        self.off = off
+
+    def check(self, value):
+        if value >= self.on:
+            return 'on'
+        return 'off' if value < self.off else None
+
+
+class Detector:
+    """One named check with hold/release hysteresis"""
+
+    def __init__(self, kind, extract, check, hold=1, release=3):
+        self.kind = kind
+        self.extract = extract
+        self.check = check
+        self.hold = hold
+        self.release = release
+        self.active = False
+        self._streak = 0
+
+    def update(self, metrics):
+        """Return 'start', 'end' or None"""
+        value = self.extract(metrics)
+        if value is None:
+            return None
+        level = self.check.check(value)
+        wanted = 'off' if self.active else 'on'
+        self._streak = self._streak + 1 if level == wanted else 0
+        if self._streak >= (self.release if self.active else self.hold):
+            self.active = not self.active
+            self._streak = 0
+            return 'start' if self.active else 'end'
+        return None
+
+
+def _positive(key):
+    def extract(metrics):
+        value = metrics.get(key) or 0
+        return value if value > 0 else None
+    return extract
+
+
+def default_detectors():
+    return [
+        # One slow frame is a spike (frametime_max is the slowest frame since the
+        # previous sample); an FPS drop must last a few samples
+        Detector('frametime_spike', _positive('frametime_max'), DeviationCheck(1, k_on=5.0, min_change=0.75),
+                 hold=1, release=2),
+        Detector('fps_drop', _positive('fps'), DeviationCheck(-1, k_on=3.0, min_change=0.15), hold=3, release=4),
+        # The prober's jitter, not 'ping': that is a windowed median with the jitter smoothed out
+        Detector('ping_jitter', _positive('jitter'), ThresholdCheck(15.0, 8.0), hold=2, release=4),
+        Detector('cpu_saturation', lambda m: max(m.get('cpu') or 0, m.get('cpu_core_max') or 0),
+                 ThresholdCheck(95.0, 85.0), hold=3, release=3),
+        Detector('ram_saturation', lambda m: m.get('memory') or 0, ThresholdCheck(90.0, 85.0), hold=3, release=3)
+    ]
+
+
+class AnomalyDetector:
+    """Runs every detector over a metrics stream; update() is O(1) per sample"""
+
+    def __init__(self, detectors=None):
+        self.detectors = detectors if detectors is not None else default_detectors()
+        self.samples = 0
+
+    @property
+    def active(self):
+        return [d.kind for d in self.detectors if d.active]
+
+    def update(self, metrics):
+        """Feed one sample; returns [(kind, 'start' | 'end'), ...]"""
+        self.samples += 1
+        if metrics.get('game', '-') == '-' and not metrics.get('fps'):
+            return []
+        events = []
+        for detector in self.detectors:
+            event = detector.update(metrics)
+            if event is not None:
+                events.append((detector.kind, event))
+        return events
+
+
+class AutoBoostPolicy:
+    """Runs only the tasks that address detected anomalies, each at most once
+    per cooldown; on_sample() may be called from the monitor thread.
+    """
+
+    def __init__(self, run_task, is_running=None, cooldown=DEFAULT_COOLDOWN, on_event=None, detector=None):
+        self.run_task = run_task
+        self.is_running = is_running or (lambda task_id: False)
+        self.cooldown = cooldown
+        self.on_event = on_event
+        self.detector = detector or AnomalyDetector()
+        self.last_run = {}
+        self._lock = threading.Lock()
+
+    def on_sample(self, metrics, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            events = self.detector.update(metrics)
+            started = []
+            for kind, event in events:
+                if event != 'start':
+                    continue
+                for task_id in ANOMALY_TASKS[kind]:
+                    last = self.last_run.get(task_id)
+                    if (last is not None and now - last < self.cooldown) or self.is_running(task_id):
+                        continue
+                    self.last_run[task_id] = now
+                    started.append(task_id)
+        for task_id in started:
+            self.run_task(task_id)
+        if self.on_event is not None:
+            for kind, event in events:
+                self.on_event(kind, event, [t for t in ANOMALY_TASKS[kind] if t in started])
+        return started
+
+
+def generate_trace(seconds=600, rate=4.0, seed=1, episode_every=(20.0, 40.0)):
+    """Synthetic monitor samples with injected anomalies
+
+    Samples carry what the monitor reports: averaged 'fps' plus the slowest
+    frame since the previous sample ('frametime_max'), and 'ping'/'jitter'
+    summarized over a sliding window of raw RTTs like LatencyProber does.
+    Returns (samples, episodes) where episodes are (kind, first, last) sample
+    index ranges used as ground truth.
+    """
+    rng = random.Random(seed)
+    total = int(seconds * rate)
+    samples = []
+    rtts = []
+    for _ in range(total):
+        fps = max(1.0, rng.gauss(140.0, 3.0))
+        samples.append({
+            'game': 'Synthetic',
+            'fps': fps,
+            'frametime_max': 1000.0 / fps * rng.uniform(1.1, 1.4),
+            'cpu': min(100.0, max(0.0, rng.gauss(45.0, 5.0))),
+            'cpu_core_max': min(100.0, max(0.0, rng.gauss(70.0, 5.0))),
+            'memory': rng.gauss(60.0, 1.0)
+        })
+        rtts.append(max(1.0, rng.gauss(25.0, 1.0)))
+
+    episodes = []
+    index = int(rng.uniform(*episode_every) * rate)
+    while index < total - 10 * rate:
+        kind = rng.choice(sorted(ANOMALY_TASKS))
+        if kind == 'frametime_spike':
+            length = 1
+        else:
+            length = int(rng.uniform(4.0, 10.0) * rate)
+        last = min(total - 1, index + length - 1)
+        for i in range(index, last + 1):
+            sample = samples[i]
+            if kind == 'frametime_spike':
+                # One hitch barely moves the averaged FPS
+                sample['frametime_max'] = rng.uniform(25.0, 60.0)
+            elif kind == 'fps_drop':
+                sample['fps'] = rng.gauss(95.0, 3.0)
+                sample['frametime_max'] = 1000.0 / sample['fps'] * rng.uniform(1.1, 1.4)
+            elif kind == 'ping_jitter':
+                rtts[i] = 25.0 + (40.0 if i % 2 else 0.0) + rng.gauss(0.0, 3.0)
+            elif kind == 'cpu_saturation':
+                sample['cpu'] = rng.uniform(96.0, 100.0)
+            else:
+                sample['memory'] = rng.uniform(92.0, 97.0)
+        episodes.append((kind, index, last))
+        index = last + 1 + int(rng.uniform(*episode_every) * rate)
+
+    window = deque(maxlen=PROBE_WINDOW)
+    for sample, rtt in zip(samples, rtts):
+        window.append(rtt)
+        stats = summarize(window)
+        sample['ping'] = stats['median']
+        sample['jitter'] = stats['jitter']
+    return samples, episodes
+
+
+def evaluate(samples, episodes, rate=4.0, grace=5.0, detector=None):
+    """Replay a trace; per-kind detections, misses, false positives and latency"""
+    detector = detector or AnomalyDetector()
+    detections = []
+    for i, sample in enumerate(samples):
+        for kind, event in detector.update(sample):
+            if event == 'start':
+                detections.append((kind, i))
+
+    grace_samples = int(grace * rate)
+    results = {kind: {'episodes': 0, 'detected': 0, 'false_positives': 0, 'latency_s': []}
+               for kind in ANOMALY_TASKS}
+    matched = set()
+    for kind, first, last in episodes:
+        stats = results[kind]
+        stats['episodes'] += 1
+        for n, (found, index) in enumerate(detections):
+            if n not in matched and found == kind and first <= index <= last + grace_samples:
+                matched.add(n)
+                stats['detected'] += 1
+                stats['latency_s'].append((index - first + 1) / rate)
+                break
+    for n, (kind, _) in enumerate(detections):
+        if n not in matched:
+            results[kind]['false_positives'] += 1
+    for stats in results.values():
+        latencies = stats.pop('latency_s')
+        stats['mean_latency_s'] = sum(latencies) / len(latencies) if latencies else None
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS anomaly detector replay")
+    parser.add_argument('--seconds', type=float, default=3600, help="length of the synthetic trace")
+    parser.add_argument('--rate', type=float, default=4.0, help="samples per second")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--session', default=None, help="replay a recorded .lrec session instead")
+    args = parser.parse_args(argv)
+
+    if args.session:
+        from session_recorder import SessionFile
+        detector = AnomalyDetector()
+        with SessionFile(args.session) as session:
+            for ts, metrics, _ in session:
+                for kind, event in detector.update(metrics):
+                    print(json.dumps({'ts': ts, 'kind': kind, 'event': event}))
+        return
+
+    samples, episodes = generate_trace(args.seconds, args.rate, args.seed)
+    start = time.perf_counter()
+    results = evaluate(samples, episodes, args.rate)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'samples': len(samples), 'us_per_sample': elapsed / len(samples) * 1e6,
+                      'results': results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
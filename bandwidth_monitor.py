@@ -0,0 +1,146 @@
+import os
+import time
+
+import psutil
+
+from contention_monitor import format_bytes
+
+# The connection table walks every process's sockets; refresh it this often
+CONNECTIONS_INTERVAL = 5.0
+
+# Background processes listed while a game runs
+TOP_BACKGROUND = 5
+
+
+def is_loopback(nic):
+    return nic == 'lo' or nic.lower().startswith('loopback')
+
+
+def _io_total(io):
+    """Bytes moved by a process; read/write_chars include sockets (Linux)"""
+    if hasattr(io, 'read_chars'):
+        return io.read_chars + io.write_chars
+    return io.read_bytes + io.write_bytes + getattr(io, 'other_bytes', 0)
+
+
+class NetProcess:
+    def __init__(self, pid, name, connections, rate):
+        self.pid = pid
+        self.name = name
+        self.connections = connections
+        self.rate = rate
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class BandwidthMonitor:
+    """Per-NIC throughput plus the processes competing with the game for the network
+
+    NIC rates come from net_io_counters(pernic=True) deltas every sample.
+    The connection table (pid -> remote connection count) is cached for
+    `connections_interval` seconds; between refreshes only the few processes
+    that own connections are read, through oneshot(). psutil has no
+    per-process socket byte counters, so a process's rate is its total I/O
+    (read/write_chars on Linux), a proxy that is dominated by network traffic
+    for downloaders and launchers.
+    """
+
+    def __init__(self, connections_interval=CONNECTIONS_INTERVAL):
+        self.connections_interval = connections_interval
+        self.latest = None
+        self._nics = None
+        self._nics_time = None
+        self._connections = {}
+        self._connections_time = None
+        self._io = {}
+        self._io_time = None
+
+    def _nic_rates(self, now):
+        counters = psutil.net_io_counters(pernic=True)
+        rates = {}
+        if self._nics is not None and now > self._nics_time:
+            elapsed = now - self._nics_time
+            for nic, io in counters.items():
+                previous = self._nics.get(nic)
+                if previous is None or is_loopback(nic):
+                    continue
+                rates[nic] = {
+                    'recv': max(0, io.bytes_recv - previous.bytes_recv) / elapsed,
+                    'sent': max(0, io.bytes_sent - previous.bytes_sent) / elapsed
+                }
+        self._nics, self._nics_time = counters, now
+        return rates
+
+    def connection_table(self, now=None):
+        """pid -> number of connections with a remote end, cached between refreshes"""
+        now = time.monotonic() if now is None else now
+        if self._connections_time is None or now - self._connections_time >= self.connections_interval:
+            table = {}
+            try:
+                connections = psutil.net_connections(kind='inet')
+            except psutil.AccessDenied:
+                connections = []
+            for conn in connections:
+                if conn.pid is not None and conn.raddr:
+                    table[conn.pid] = table.get(conn.pid, 0) + 1
+            self._connections, self._connections_time = table, now
+        return self._connections
+
+    def _rank(self, table, game_pid, now):
+        elapsed = now - self._io_time if self._io_time is not None else None
+        io_totals = {}
+        ranked = []
+        game = None
+        exclude = os.getpid()
+        for pid, count in table.items():
+            if pid == exclude:
+                continue
+            try:
+                proc = psutil.Process(pid)
+                with proc.oneshot():
+                    name = proc.name()
+                    key = (pid, proc.create_time())
+                    io_totals[key] = _io_total(proc.io_counters())
+            except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
+                continue
+            previous = self._io.get(key)
+            rate = max(0, io_totals[key] - previous) / elapsed if previous is not None and elapsed else 0.0
+            entry = NetProcess(pid, name, count, rate)
+            if pid == game_pid:
+                game = entry
+            else:
+                ranked.append(entry)
+        self._io, self._io_time = io_totals, now
+        ranked.sort(key=lambda p: (p.rate, p.connections), reverse=True)
+        return game, ranked[:TOP_BACKGROUND]
+
+    def sample(self, game_pid=None):
+        """Read NIC rates and, while a game runs, rank background processes"""
+        now = time.monotonic()
+        nics = self._nic_rates(now)
+        game, background = None, []
+        if game_pid is not None:
+            game, background = self._rank(self.connection_table(now), game_pid, now)
+        else:
+            self._io, self._io_time = {}, None
+        self.latest = {
+            'recv': sum(rate['recv'] for rate in nics.values()),
+            'sent': sum(rate['sent'] for rate in nics.values()),
+            'nics': nics,
+            'game': game.as_dict() if game is not None else None,
+            'background': [p.as_dict() for p in background]
+        }
+        return self.latest
+
+    def describe(self, snapshot=None):
+        """e.g. 'Sieć ↓ 5.2 MB ↑ 120 KB/s; w tle: steam (12 poł., 4 MB/s)'"""
+        snapshot = snapshot or self.latest
+        if snapshot is None:
+            return ""
+        text = f"Sieć ↓ {format_bytes(snapshot['recv'])}/s ↑ {format_bytes(snapshot['sent'])}/s"
+        hogs = [p for p in snapshot['background'] if p['rate'] > 0 or p['connections'] > 0][:3]
+        if hogs:
+            text += "; w tle: " + ", ".join(
+                f"{p['name']} ({p['connections']} poł., {format_bytes(p['rate'])}/s)" for p in hogs)
+        return text
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Luna FPS shader/DX cache cleaner
+Walks cache roots in parallel and deletes (or, with --dry-run, only counts)
+old cache files.
+"""
+
+import argparse
+import os
+import platform
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Files younger than this are left alone; the running game may still be writing them
+DEFAULT_MIN_AGE = 3600
+
+# How many files a worker handles between progress reports
+REPORT_EVERY = 500
+# How often the coordinating thread checks for cancellation while waiting, in seconds
+POLL_INTERVAL = 0.1
+
+
+def default_cache_roots():
+    """Shader/DX cache directories of the current platform that exist"""
+    if platform.system() == "Windows":
+        local = os.environ.get('LOCALAPPDATA', '')
+        candidates = [
+            os.path.join(local, 'D3DSCache'),
+            os.path.join(local, 'NVIDIA', 'DXCache'),
+            os.path.join(local, 'NVIDIA', 'GLCache'),
+            os.path.join(local, 'AMD', 'DxCache'),
+            os.path.join(local, 'AMD', 'GLCache')
+        ]
+    else:
+        cache = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+        candidates = [
+            os.path.join(cache, 'mesa_shader_cache'),
+            os.path.join(cache, 'mesa_shader_cache_db'),
+            os.path.join(cache, 'nvidia', 'GLCache'),
+            os.path.join(cache, 'radv_builtin_shaders64')
+        ]
+    return [path for path in candidates if os.path.isdir(path)]
+
+
+class CleanReport:
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.skipped_young = 0
+        self.skipped_in_use = 0
+        self.errors = 0
+        self.roots_done = 0
+
+    def add(self, other):
+        self.files += other.files
+        self.bytes += other.bytes
+        self.skipped_young += other.skipped_young
+        self.skipped_in_use += other.skipped_in_use
+        self.errors += other.errors
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def describe(self, dry_run=False):
+        verb = "Do usunięcia" if dry_run else "Usunięto"
+        return f"{verb}: {self.files} plików, {self.bytes / (1024 * 1024):.1f} MB"
+
+
+class CacheCleaner:
+    """Cleans cache roots with one worker per root
+
+    Directories are walked with os.scandir using a stack of directory paths
+    only, so memory does not grow with the number of files. Workers only
+    hand partial reports to the calling thread, which aggregates them,
+    reports progress and checks for cancellation.
+    """
+
+    def __init__(self, roots=None, min_age=DEFAULT_MIN_AGE, dry_run=False, workers=4):
+        self.roots = list(roots) if roots is not None else default_cache_roots()
+        self.min_age = min_age
+        self.dry_run = dry_run
+        self.workers = workers
+        self.report = CleanReport()
+
+    def clean(self, progress=None, cancelled=None, total_files=None):
+        """Clean every root; progress(fraction, report) fires on the calling thread
+
+        With total_files (e.g. from a dry run) progress is per file,
+        otherwise per finished root.
+        """
+        self.report = CleanReport()
+        if not self.roots:
+            return self.report
+        cutoff = time.time() - self.min_age
+        stop = threading.Event()
+        updates = queue.Queue()
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(self.roots))) as pool:
+            futures = [pool.submit(self._clean_root, root, cutoff, updates.put, stop.is_set) for root in self.roots]
+            try:
+                pending = len(futures)
+                while pending:
+                    try:
+                        partial, root_done = updates.get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        partial = None
+                    if partial is not None:
+                        self.report.add(partial)
+                        if root_done:
+                            self.report.roots_done += 1
+                            pending -= 1
+                        if progress is not None:
+                            progress(self._fraction(total_files), self.report)
+                    if cancelled is not None and cancelled():
+                        stop.set()
+            finally:
+                # Also stops the workers when progress() raises
+                stop.set()
+            for future in futures:
+                future.result()
+        return self.report
+
+    def _fraction(self, total_files):
+        report = self.report
+        if total_files:
+            return min(1.0, (report.files + report.skipped_in_use) / total_files)
+        return report.roots_done / len(self.roots)
+
+    def _clean_root(self, root, cutoff, publish, stopped):
+        partial = CleanReport()
+        seen = 0
+        stack = [root]
+        try:
+            while stack and not stopped():
+                path = stack.pop()
+                try:
+                    entries = os.scandir(path)
+                except OSError:
+                    partial.errors += 1
+                    continue
+                with entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            partial.errors += 1
+                            continue
+                        if st.st_mtime > cutoff:
+                            partial.skipped_young += 1
+                            continue
+                        if not self.dry_run:
+                            try:
+                                os.unlink(entry.path)
+                            except PermissionError:
+                                # Locked by a running process (Windows) or not ours
+                                partial.skipped_in_use += 1
+                                continue
+                            except OSError:
+                                partial.errors += 1
+                                continue
+                        partial.files += 1
+                        partial.bytes += st.st_size
+                        seen += 1
+                        if seen % REPORT_EVERY == 0:
+                            publish((partial, False))
+                            partial = CleanReport()
+                            if stopped():
+                                break
+        finally:
+            # Always sent, so the calling thread never waits for a failed worker
+            publish((partial, True))
+
+
+def cache_task(roots=None, min_age=DEFAULT_MIN_AGE, dry_run=False):
+    """TaskEngine runner for the 'cache' task
+
+    A dry run counts what would be removed first; it is shown as the task's
+    status and gives per-file progress for the actual clean. With
+    dry_run=True the task stops after the preview.
+    """
+    def run(ctx):
+        cleaner = CacheCleaner(roots, min_age=min_age, dry_run=True)
+        if not cleaner.roots:
+            return "Brak katalogów cache"
+        ctx.progress(0.0, "Liczę pliki cache")
+        preview = cleaner.clean(
+            progress=lambda fraction, report: ctx.progress(0.1 * fraction, report.describe(dry_run=True)),
+            cancelled=lambda: ctx.cancelled
+        )
+        ctx.check()
+        if dry_run or not preview.files:
+            return preview.describe(dry_run=True)
+        ctx.progress(0.1, preview.describe(dry_run=True))
+        cleaner.dry_run = False
+        report = cleaner.clean(
+            progress=lambda fraction, report: ctx.progress(0.1 + 0.9 * fraction, report.describe()),
+            cancelled=lambda: ctx.cancelled,
+            total_files=preview.files
+        )
+        ctx.check()
+        return report.describe()
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS cache cleaner")
+    parser.add_argument('roots', nargs='*', help="cache directories (default: detected shader caches)")
+    parser.add_argument('--dry-run', action='store_true', help="only count what would be removed")
+    parser.add_argument('--min-age', type=float, default=DEFAULT_MIN_AGE, help="skip files younger than N seconds")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    cleaner = CacheCleaner(args.roots or None, min_age=args.min_age, dry_run=args.dry_run, workers=args.workers)
+    if not cleaner.roots:
+        print("Brak katalogów cache", file=sys.stderr)
+        return
+    report = cleaner.clean(progress=lambda fraction, report: print(
+        f"\r{fraction * 100:5.1f}%  {report.describe(args.dry_run)}", end='', file=sys.stderr))
+    print(file=sys.stderr)
+    print(report.as_dict())
+
+
+if __name__ == "__main__":
+    main()
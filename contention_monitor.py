@@ -0,0 +1,184 @@
+import os
+import time
+
+import psutil
+
+PSI_RESOURCES = ('cpu', 'memory', 'io')
+PSI_ROOT = '/proc/pressure'
+VMSTAT_PATH = '/proc/vmstat'
+VMSTAT_KEYS = ('pswpin', 'pswpout', 'pgfault', 'pgmajfault')
+
+# "some" avg10 stall percentages above which a resource counts as contended
+STALL_THRESHOLDS = {
+    'cpu': 20.0,
+    'memory': 5.0,
+    'io': 10.0
+}
+# Swapped pages per second considered heavy swapping
+SWAP_RATE_THRESHOLD = 100.0
+# Memory usage (%) treated as pressure where PSI is not available
+MEMORY_PERCENT_THRESHOLD = 85.0
+
+
+def read_psi(resource, root=PSI_ROOT):
+    """Parse /proc/pressure/<resource> into {'some': {...}, 'full': {...}}, or None"""
+    try:
+        with open(os.path.join(root, resource)) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    psi = {}
+    for line in lines:
+        kind, *fields = line.split()
+        values = dict(field.split('=', 1) for field in fields)
+        psi[kind] = {key: float(value) for key, value in values.items()}
+    return psi
+
+
+def read_vmstat(path=VMSTAT_PATH, keys=VMSTAT_KEYS):
+    """Read selected /proc/vmstat counters, or None where the file is missing"""
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    counters = {}
+    for line in lines:
+        key, _, value = line.partition(' ')
+        if key in keys:
+            counters[key] = int(value)
+    return counters
+
+
+def format_bytes(count):
+    if count >= 1024 ** 3:
+        return f"{count / 1024 ** 3:.1f} GB"
+    if count >= 1024 * 1024:
+        return f"{count / 1024 ** 2:.0f} MB"
+    return f"{count / 1024:.0f} KB"
+
+
+class Offender:
+    def __init__(self, pid, name, rss, io_rate):
+        self.pid = pid
+        self.name = name
+        self.rss = rss
+        self.io_rate = io_rate
+
+
+class ContentionMonitor:
+    """Streams pressure-stall (PSI), swap and page-fault rates and finds the
+    background processes behind memory and IO contention.
+
+    sample() is cheap (a few /proc reads) and runs on the monitor scheduler;
+    top_offenders() walks every process and is meant for tasks.
+    """
+
+    def __init__(self, psi_root=PSI_ROOT, vmstat_path=VMSTAT_PATH):
+        self.psi_root = psi_root
+        self.vmstat_path = vmstat_path
+        self.available = os.path.isdir(psi_root)
+        self.latest = None
+        self._counters = None
+        self._counters_time = None
+        self._io = {}
+        self._io_time = None
+
+    def _read_counters(self):
+        counters = read_vmstat(self.vmstat_path)
+        if counters is None:
+            # Swap totals in bytes elsewhere; convert to 4 KiB pages like vmstat
+            swap = psutil.swap_memory()
+            counters = {'pswpin': swap.sin // 4096, 'pswpout': swap.sout // 4096}
+        return counters
+
+    def sample(self):
+        """Read PSI and counter rates; returns and stores the latest pressure dict"""
+        now = time.monotonic()
+        counters = self._read_counters()
+        rates = {}
+        if self._counters is not None and now > self._counters_time:
+            elapsed = now - self._counters_time
+            rates = {key: max(0, value - self._counters.get(key, value)) / elapsed
+                     for key, value in counters.items()}
+        self._counters = counters
+        self._counters_time = now
+
+        stall = {}
+        for resource in PSI_RESOURCES:
+            psi = read_psi(resource, self.psi_root) if self.available else None
+            if psi is not None:
+                stall[resource] = psi['some']['avg10']
+
+        self.latest = {
+            'stall': stall,
+            'swap_in': rates.get('pswpin', 0.0),
+            'swap_out': rates.get('pswpout', 0.0),
+            'page_faults': rates.get('pgfault', 0.0),
+            'major_faults': rates.get('pgmajfault', 0.0),
+            'memory_percent': psutil.virtual_memory().percent
+        }
+        return self.latest
+
+    def top_offenders(self, count=3, exclude_pids=()):
+        """Return (by_memory, by_io) lists of the heaviest processes
+
+        Each process is read once through process_iter(attrs), which batches
+        the reads in oneshot(). IO rates are deltas since the previous call,
+        so the first call ranks IO by nothing (all zero).
+        """
+        exclude = set(exclude_pids) | {os.getpid()}
+        now = time.monotonic()
+        elapsed = now - self._io_time if self._io_time is not None else None
+        io_totals = {}
+        offenders = []
+        for proc in psutil.process_iter(['name', 'memory_info', 'io_counters', 'create_time']):
+            info = proc.info
+            if proc.pid in exclude or info['memory_info'] is None:
+                continue
+            io_rate = 0.0
+            io = info['io_counters']
+            if io is not None:
+                key = (proc.pid, info['create_time'])
+                io_totals[key] = io.read_bytes + io.write_bytes
+                previous = self._io.get(key)
+                if previous is not None and elapsed:
+                    io_rate = max(0, io_totals[key] - previous) / elapsed
+            offenders.append(Offender(proc.pid, info['name'] or str(proc.pid), info['memory_info'].rss, io_rate))
+        self._io = io_totals
+        self._io_time = now
+
+        by_memory = sorted(offenders, key=lambda o: o.rss, reverse=True)[:count]
+        by_io = [o for o in sorted(offenders, key=lambda o: o.io_rate, reverse=True) if o.io_rate > 0][:count]
+        return by_memory, by_io
+
+    def contended(self, resource, pressure=None):
+        """Whether a resource ('cpu', 'memory', 'io') is under pressure right now"""
+        pressure = pressure or self.latest or self.sample()
+        stall = pressure['stall'].get(resource)
+        if resource == 'memory':
+            swapping = pressure['swap_in'] + pressure['swap_out'] >= SWAP_RATE_THRESHOLD
+            if stall is None:
+                return swapping or pressure['memory_percent'] >= MEMORY_PERCENT_THRESHOLD
+            return swapping or stall >= STALL_THRESHOLDS['memory']
+        return stall is not None and stall >= STALL_THRESHOLDS[resource]
+
+    def describe(self, resource, pressure, offenders):
+        """Actionable one-line summary, e.g. 'Przestoje pamięci 8% (10 s), winowajcy: X, Y'"""
+        label = {'cpu': "CPU", 'memory': "pamięci", 'io': "dysku"}[resource]
+        stall = pressure['stall'].get(resource)
+        if stall is not None:
+            text = f"Przestoje {label} {stall:.0f}% w ostatnich 10 s"
+        elif resource == 'memory':
+            text = f"RAM zajęty w {pressure['memory_percent']:.0f}%"
+        else:
+            text = f"Brak danych o przestojach {label}"
+        if resource == 'memory' and pressure['swap_in'] + pressure['swap_out'] >= 1:
+            text += f", swap {pressure['swap_in'] + pressure['swap_out']:.0f} str./s"
+        if offenders:
+            if resource == 'io':
+                names = [f"{o.name} ({format_bytes(o.io_rate)}/s)" for o in offenders]
+            else:
+                names = [f"{o.name} ({format_bytes(o.rss)})" for o in offenders]
+            text += ", winowajcy: " + ", ".join(names)
+        return text
@@ -0,0 +1,159 @@
+import time
+
+import psutil
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A game thread using this much of one core is treated as the bottleneck
+MAIN_THREAD_BOUND = 85.0
+# System-wide CPU at which every core counts as saturated
+ALL_CORES_BOUND = 90.0
+# Clock below this fraction of the reference frequency counts as throttling...
+THROTTLE_RATIO = 0.8
+# ...when it lasts this many samples while some core is at least this busy
+THROTTLE_SAMPLES = 3
+THROTTLE_MIN_LOAD = 50.0
+
+# cpu_times fields that are idle time, and ones already counted in user/nice
+IDLE_FIELDS = ('idle', 'iowait')
+GUEST_FIELDS = ('guest', 'guest_nice')
+
+
+def core_busy(previous, current):
+    """Busy percentage per core between two cpu_times(percpu=True) readings"""
+    fields = current[0]._fields
+    counted = [i for i, name in enumerate(fields) if name not in GUEST_FIELDS]
+    idle = [i for i, name in enumerate(fields) if name in IDLE_FIELDS]
+    if np is not None:
+        delta = np.asarray(current, dtype=np.float64) - np.asarray(previous, dtype=np.float64)
+        total = delta[:, counted].sum(axis=1)
+        idle_time = delta[:, idle].sum(axis=1)
+        busy = np.divide(total - idle_time, total, out=np.zeros_like(total), where=total > 0)
+        return (busy.clip(0.0, 1.0) * 100.0).tolist()
+    busy = []
+    for before, after in zip(previous, current):
+        total = sum(after[i] - before[i] for i in counted)
+        idle_time = sum(after[i] - before[i] for i in idle)
+        busy.append(min(100.0, max(0.0, (total - idle_time) / total * 100.0)) if total > 0 else 0.0)
+    return busy
+
+
+def thread_core(pid, tid):
+    """Core a thread last ran on (Linux /proc), or None"""
+    try:
+        with open(f"/proc/{pid}/task/{tid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Field 39 ("processor"); split after the parenthesised comm, which may contain spaces
+    fields = stat.rpartition(')')[2].split()
+    return int(fields[36]) if len(fields) > 36 else None
+
+
+class CoreMonitor:
+    """Per-core load, clock frequency and per-thread CPU of the game
+
+    sample() is non-blocking: loads are deltas against the previous call.
+    The result flags a single-thread bottleneck ("main thread bound on
+    core N") or frequency throttling as soon as they appear.
+    """
+
+    def __init__(self):
+        self.latest = None
+        self.reference_freq = None
+        self._times = None
+        self._threads = {}
+        self._threads_pid = None
+        self._threads_time = None
+        self._throttled_for = 0
+
+    def _sample_threads(self, pid, now):
+        """CPU% of one core per game thread since the last call, hottest first"""
+        if pid is None:
+            self._threads, self._threads_pid = {}, None
+            return []
+        try:
+            threads = psutil.Process(pid).threads()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return []
+        totals = {t.id: t.user_time + t.system_time for t in threads}
+        usage = []
+        if pid == self._threads_pid and now > self._threads_time:
+            elapsed = now - self._threads_time
+            for tid, total in totals.items():
+                previous = self._threads.get(tid)
+                if previous is not None:
+                    usage.append((tid, max(0.0, total - previous) / elapsed * 100.0))
+            usage.sort(key=lambda item: item[1], reverse=True)
+        self._threads, self._threads_pid, self._threads_time = totals, pid, now
+        return usage
+
+    def _frequency(self, busiest):
+        freq = psutil.cpu_freq() if hasattr(psutil, 'cpu_freq') else None
+        if not freq or not freq.current:
+            self._throttled_for = 0
+            return None, False
+        # Without a reported maximum, compare against the highest clock seen
+        reference = freq.max or max(self.reference_freq or 0.0, freq.current)
+        self.reference_freq = reference
+        if freq.current < reference * THROTTLE_RATIO and busiest >= THROTTLE_MIN_LOAD:
+            self._throttled_for += 1
+        else:
+            self._throttled_for = 0
+        return {'current': freq.current, 'reference': reference}, self._throttled_for >= THROTTLE_SAMPLES
+
+    def sample(self, game_pid=None):
+        """Take one reading; returns and stores the latest snapshot dict"""
+        now = time.monotonic()
+        times = psutil.cpu_times(percpu=True)
+        per_core = core_busy(self._times, times) if self._times is not None and len(self._times) == len(times) else []
+        self._times = times
+
+        busiest = max(range(len(per_core)), key=per_core.__getitem__) if per_core else None
+        average = sum(per_core) / len(per_core) if per_core else 0.0
+        threads = self._sample_threads(game_pid, now)
+        freq, throttled = self._frequency(per_core[busiest] if per_core else 0.0)
+
+        bottleneck = None
+        if threads and threads[0][1] >= MAIN_THREAD_BOUND:
+            tid, percent = threads[0]
+            core = thread_core(game_pid, tid)
+            bottleneck = {
+                'kind': 'main_thread',
+                'thread': tid,
+                'percent': percent,
+                'core': core if core is not None else busiest
+            }
+        elif per_core and average >= ALL_CORES_BOUND:
+            bottleneck = {'kind': 'all_cores', 'percent': average}
+
+        self.latest = {
+            'per_core': per_core,
+            'average': average,
+            'busiest': busiest,
+            'busiest_percent': per_core[busiest] if per_core else 0.0,
+            'freq': freq,
+            'throttled': throttled,
+            'threads': threads[:5],
+            'bottleneck': bottleneck
+        }
+        return self.latest
+
+    def describe(self, snapshot=None):
+        """Short Polish text of the current bottleneck/throttling, '' when none"""
+        snapshot = snapshot or self.latest
+        if snapshot is None:
+            return ""
+        alerts = []
+        bottleneck = snapshot['bottleneck']
+        if bottleneck is not None and bottleneck['kind'] == 'main_thread':
+            alerts.append(f"Główny wątek gry ogranicza na rdzeniu {bottleneck['core']} ({bottleneck['percent']:.0f}%)")
+        elif bottleneck is not None:
+            alerts.append(f"Wszystkie rdzenie obciążone ({bottleneck['percent']:.0f}%)")
+        if snapshot['throttled']:
+            freq = snapshot['freq']
+            alerts.append(f"Spadek taktowania: {freq['current'] / 1000:.1f}/{freq['reference'] / 1000:.1f} GHz")
+        return "; ".join(alerts)
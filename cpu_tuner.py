@@ -0,0 +1,186 @@
+import os
+import platform
+
+import psutil
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Background processes moved off the game's cores unless a profile says otherwise
+DEFAULT_BACKGROUND_PROCESSES = (
+    'discord.exe', 'chrome.exe', 'msedge.exe', 'firefox.exe', 'steamwebhelper.exe',
+    'epicgameslauncher.exe', 'onedrive.exe', 'spotify.exe', 'teams.exe'
+)
+
+# Niceness steps applied on POSIX (Windows uses priority classes)
+GAME_NICE_STEP = -5
+BACKGROUND_NICE_STEP = 5
+
+IS_WINDOWS = platform.system() == "Windows"
+
+
+def min_allowed_nice():
+    """Lowest niceness this process may set (POSIX), honouring RLIMIT_NICE"""
+    if IS_WINDOWS:
+        return None
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        return -20
+    if resource is not None and hasattr(resource, 'RLIMIT_NICE'):
+        soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+        if soft == resource.RLIM_INFINITY:
+            return -20
+        # Unprivileged processes may go down to 20 - RLIMIT_NICE
+        return 20 - min(40, soft)
+    return 20
+
+
+def process_stem(name):
+    """Lower-case process name without '.exe', so Windows names match POSIX ones"""
+    name = name.lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+def supports_affinity():
+    return hasattr(psutil.Process, 'cpu_affinity')
+
+
+def least_loaded_cores(count, per_core=None):
+    """Return `count` core ids, least busy first
+
+    Without a reading, per-core load since the previous call is used
+    (non-blocking; all zeros on the first call, i.e. cores in order).
+    """
+    if per_core is None:
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+    order = sorted(range(len(per_core)), key=lambda core: per_core[core])
+    return sorted(order[:max(1, count)])
+
+
+class ProcessChange:
+    """Original scheduling state of one process, so it can be restored exactly"""
+
+    def __init__(self, pid, create_time, nice, affinity):
+        self.pid = pid
+        self.create_time = create_time
+        self.nice = nice
+        self.affinity = affinity
+
+
+class CpuTuner:
+    """Raises the game's priority, pins it to the least-loaded cores and moves
+    background processes to the remaining ones; undo() restores everything.
+    """
+
+    def __init__(self, background_names=DEFAULT_BACKGROUND_PROCESSES, reserve_cores=None):
+        self.background_names = {process_stem(name) for name in background_names}
+        self.reserve_cores = reserve_cores
+        self.changes = {}
+        self.errors = []
+
+    def plan_cores(self, per_core=None, keep_cores=()):
+        """Split cores into (game cores, background cores)
+
+        keep_cores stay with the game even though they look busy, e.g. the
+        core its bottleneck thread runs on (the game itself is the load there).
+        """
+        total = psutil.cpu_count(logical=True) or 1
+        if total == 1:
+            return [0], [0]
+        reserve = self.reserve_cores if self.reserve_cores is not None else max(1, total // 4)
+        reserve = min(max(1, reserve), total - 1)
+        game_cores = least_loaded_cores(total - reserve, per_core)
+        for core in keep_cores:
+            if 0 <= core < total and core not in game_cores:
+                # Give up the busiest of the chosen cores instead
+                if per_core is not None and len(per_core) == total:
+                    game_cores.remove(max(game_cores, key=lambda c: per_core[c]))
+                else:
+                    game_cores.pop()
+                game_cores = sorted(game_cores + [core])
+        background = [core for core in range(total) if core not in game_cores]
+        return game_cores, background
+
+    def add_background(self, names):
+        self.background_names.update(process_stem(name) for name in names)
+
+    def find_background(self, exclude_pid=None):
+        """PIDs of running processes whose name is in the background list ('.exe' optional)"""
+        pids = []
+        for proc in psutil.process_iter(['name']):
+            name = process_stem(proc.info.get('name') or '')
+            if proc.pid != exclude_pid and name in self.background_names:
+                pids.append(proc.pid)
+        return pids
+
+    def _record(self, proc):
+        if proc.pid in self.changes:
+            return
+        with proc.oneshot():
+            affinity = proc.cpu_affinity() if supports_affinity() else None
+            self.changes[proc.pid] = ProcessChange(proc.pid, proc.create_time(), proc.nice(), affinity)
+
+    def _set_nice(self, proc, step):
+        original = self.changes[proc.pid].nice
+        if IS_WINDOWS:
+            proc.nice(psutil.HIGH_PRIORITY_CLASS if step < 0 else psutil.BELOW_NORMAL_PRIORITY_CLASS)
+            return True
+        target = max(-20, min(19, original + step))
+        floor = min_allowed_nice()
+        # Only renice when the original value can be put back afterwards
+        if target < floor or original < floor:
+            return False
+        proc.nice(target)
+        return True
+
+    def tune(self, game_pid, background_pids=None, per_core=None, progress=None, keep_cores=()):
+        """Apply the changes; returns a short summary"""
+        game_cores, background_cores = self.plan_cores(per_core, keep_cores)
+        if background_pids is None:
+            background_pids = self.find_background(exclude_pid=game_pid)
+        targets = [(game_pid, GAME_NICE_STEP, game_cores)]
+        targets += [(pid, BACKGROUND_NICE_STEP, background_cores) for pid in background_pids]
+
+        tuned = []
+        reniced = []
+        for i, (pid, step, cores) in enumerate(targets):
+            try:
+                proc = psutil.Process(pid)
+                self._record(proc)
+                if self._set_nice(proc, step):
+                    reniced.append(pid)
+                if supports_affinity():
+                    proc.cpu_affinity(cores)
+                tuned.append(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                self.errors.append((pid, str(e)))
+            if progress is not None:
+                progress((i + 1) / len(targets))
+        moved = len([pid for pid in tuned if pid != game_pid])
+        lowered = len([pid for pid in reniced if pid != game_pid])
+        if game_pid not in tuned:
+            summary = "Brak dostępu do procesu gry"
+        elif game_pid in reniced:
+            summary = f"Gra na rdzeniach {game_cores}, priorytet podniesiony"
+        else:
+            summary = f"Gra na rdzeniach {game_cores}, priorytet bez zmian (brak uprawnień)"
+        return f"{summary}; przeniesiono {moved} procesów w tle (niższy priorytet: {lowered})"
+
+    def undo(self):
+        """Restore original niceness and affinity of every changed process"""
+        restored = 0
+        for pid, change in list(self.changes.items()):
+            try:
+                proc = psutil.Process(pid)
+                # Skip PIDs that now belong to a different process
+                if proc.create_time() == change.create_time:
+                    if change.affinity is not None:
+                        proc.cpu_affinity(change.affinity)
+                    if proc.nice() != change.nice:
+                        proc.nice(change.nice)
+                    restored += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                self.errors.append((pid, str(e)))
+            del self.changes[pid]
+        return restored
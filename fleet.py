@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Luna FPS fleet
+Agents batch monitor samples and push them over UDP or TCP to an asyncio
+collector, which keeps rolling per-host aggregates and answers fleet queries
+over HTTP (e.g. the 10 stations with the worst 1% low FPS). Stations run
+`headless.py --fleet HOST:PORT` as agents.
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from metrics_store import MetricsStore
+
+DEFAULT_PORT = 47810
+MAGIC = b'LFA1'
+
+# Batch: magic, sequence, send time, sample count, then host and game names
+# (u8 length + UTF-8) and `count` records. TCP streams start with MAGIC and
+# carry batches as u32 length-prefixed frames.
+BATCH_HEADER = struct.Struct('<4sIdH')
+RECORD = struct.Struct('<dfffff')
+RECORD_FIELDS = ('fps', 'ping', 'cpu', 'memory', 'network')
+FRAME_LENGTH = struct.Struct('<I')
+
+# Keeps UDP batches under a typical 1500-byte MTU
+MAX_BATCH = 40
+# Per-host history: 10 minutes at 4 samples/s
+HOST_CAPACITY = 2400
+# Hosts silent for longer are reported as stale, and may be evicted to admit
+# a new host once MAX_HOSTS is reached
+STALE_AFTER = 30.0
+MAX_HOSTS = 1024
+# Hosts silent for longer are dropped; checked at most every EVICT_INTERVAL
+EVICT_AFTER = 600.0
+EVICT_INTERVAL = 60.0
+
+# Agent side: TCP batches waiting for the collector (beyond this new ones are
+# dropped), the connect timeout and the reconnect backoff range, in seconds
+MAX_PENDING = 64
+CONNECT_TIMEOUT = 1.0
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+AGGREGATE_SERIES = ('fps', 'ping', 'cpu')
+
+# Query keys: (function of a host summary, True if higher is worse)
+RANKINGS = {
+    'fps_1low': (lambda s: s['fps_1low'], False),
+    'fps_avg': (lambda s: s['fps_avg'], False),
+    'ping_avg': (lambda s: s['ping_avg'], True),
+    'cpu_avg': (lambda s: s['cpu_avg'], True)
+}
+
+
+def _pack_name(name):
+    data = name.encode('utf-8')[:255]
+    return bytes((len(data),)) + data
+
+
+def encode_batch(seq, host, game, samples, sent=None):
+    """samples: [(timestamp, metrics dict), ...]"""
+    parts = [BATCH_HEADER.pack(MAGIC, seq, time.time() if sent is None else sent, len(samples)),
+             _pack_name(host), _pack_name(game)]
+    for ts, metrics in samples:
+        parts.append(RECORD.pack(ts, *(float(metrics.get(name, 0) or 0) for name in RECORD_FIELDS)))
+    return b''.join(parts)
+
+
+def decode_batch(data):
+    """Return (seq, sent, host, game, records) or raise ValueError"""
+    try:
+        magic, seq, sent, count = BATCH_HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("bad magic")
+        offset = BATCH_HEADER.size
+        names = []
+        for _ in range(2):
+            length = data[offset]
+            names.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8', 'replace'))
+            offset += 1 + length
+        if len(data) < offset + count * RECORD.size:
+            raise ValueError("truncated batch")
+        records = list(RECORD.iter_unpack(memoryview(data)[offset:offset + count * RECORD.size]))
+    except (struct.error, IndexError) as e:
+        raise ValueError(str(e)) from None
+    return seq, sent, names[0], names[1], records
+
+
+class FleetAgent:
+    """Batches samples and sends them to a collector; add() is thread-safe
+
+    A batch goes out when it is full or `flush_interval` seconds old. UDP
+    sends are non-blocking and go out from the caller's thread. TCP batches
+    are queued for a sender thread, which reconnects with exponential
+    backoff, so an unreachable collector never stalls the caller.
+    """
+
+    def __init__(self, collector, host=None, transport='udp', batch_size=20, flush_interval=2.0):
+        self.collector = collector
+        self.host = host or socket.gethostname()
+        self.transport = transport
+        self.batch_size = min(batch_size, MAX_BATCH)
+        self.flush_interval = flush_interval
+        self.seq = 0
+        self.sent = 0
+        self.dropped = 0
+        self._batch = []
+        self._game = '-'
+        self._first = None
+        self._sock = None
+        self._address = None
+        self._retry_at = 0.0
+        self._backoff = MIN_BACKOFF
+        self._lock = threading.Lock()
+        self._queue = None
+        self._sender = None
+        self._closing = threading.Event()
+
+    def add(self, metrics, timestamp=None):
+        with self._lock:
+            if not self._batch:
+                self._first = time.monotonic()
+            self._batch.append((time.time() if timestamp is None else timestamp, metrics))
+            self._game = metrics.get('game', '-') or '-'
+            if len(self._batch) >= self.batch_size or time.monotonic() - self._first >= self.flush_interval:
+                self._send()
+
+    def flush(self):
+        with self._lock:
+            if self._batch:
+                self._send()
+
+    def _send(self):
+        batch, self._batch = self._batch, []
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        data = encode_batch(self.seq, self.host, self._game, batch)
+        if self.transport == 'udp':
+            self._send_udp(data, len(batch))
+        else:
+            self._enqueue(data, len(batch))
+
+    def _failed(self):
+        """Back off before the next connect/resolve attempt"""
+        self._retry_at = time.monotonic() + self._backoff
+        self._backoff = min(MAX_BACKOFF, self._backoff * 2)
+
+    def _send_udp(self, data, count):
+        if self._sock is None and time.monotonic() < self._retry_at:
+            self.dropped += count
+            return
+        try:
+            if self._sock is None:
+                # Resolve once; sendto() with a host name would look it up every batch
+                family, _, _, _, address = socket.getaddrinfo(*self.collector, type=socket.SOCK_DGRAM)[0]
+                sock = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                self._sock, self._address = sock, address
+                self._backoff = MIN_BACKOFF
+            self._sock.sendto(data, self._address)
+            self.sent += count
+        except OSError:
+            self.dropped += count
+            if self._sock is None:
+                self._failed()
+
+    def _enqueue(self, data, count):
+        if self._sender is None:
+            self._queue = queue.Queue(MAX_PENDING)
+            self._sender = threading.Thread(target=self._send_loop, name="FleetAgent", daemon=True)
+            self._sender.start()
+        try:
+            self._queue.put_nowait((data, count))
+        except queue.Full:
+            self.dropped += count
+
+    def _send_loop(self):
+        """TCP sender thread: owns the connection"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            data, count = item
+            delay = self._retry_at - time.monotonic()
+            if delay > 0 and self._closing.wait(delay):
+                # Closing while the collector is unreachable: drop what is left
+                self._count(dropped=count)
+                continue
+            try:
+                if self._sock is None:
+                    sock = socket.create_connection(self.collector, timeout=CONNECT_TIMEOUT)
+                    sock.sendall(MAGIC)
+                    self._sock = sock
+                    self._backoff = MIN_BACKOFF
+                self._sock.sendall(FRAME_LENGTH.pack(len(data)) + data)
+                self._count(sent=count)
+            except OSError:
+                self._count(dropped=count)
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+                self._failed()
+
+    def _count(self, sent=0, dropped=0):
+        with self._lock:
+            self.sent += sent
+            self.dropped += dropped
+
+    def close(self):
+        self.flush()
+        if self._sender is not None:
+            self._closing.set()
+            try:
+                self._queue.put(None, timeout=CONNECT_TIMEOUT)
+            except queue.Full:
+                pass
+            self._sender.join(CONNECT_TIMEOUT * 2)
+            self._sender = None
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+
+class HostAggregate:
+    """Rolling per-host history plus delivery bookkeeping"""
+
+    def __init__(self, host, capacity=HOST_CAPACITY):
+        self.host = host
+        self.store = MetricsStore(capacity, series=AGGREGATE_SERIES)
+        self.game = '-'
+        self.samples = 0
+        self.batches = 0
+        self.lost_batches = 0
+        self.last_seq = None
+        self.last_seen = None
+        self.last_time = None
+
+    def ingest(self, seq, sent, game, records, now):
+        if self.last_seq is not None:
+            gap = (seq - self.last_seq) & 0xFFFFFFFF
+            # Gaps are lost UDP batches; a huge gap means the agent restarted
+            if 1 < gap < 1000:
+                self.lost_batches += gap - 1
+        self.last_seq = seq
+        self.game = game
+        self.batches += 1
+        self.last_seen = now
+        append = self.store.append
+        last = self.last_time if self.last_time is not None else float('-inf')
+        for ts, fps, ping, cpu, _, _ in records:
+            # Agent clocks may be off; place samples by their age at send time.
+            # Arrival jitter must not move time backwards: windows bisect the ring
+            last = max(last, now - max(0.0, sent - ts))
+            append({'fps': fps, 'ping': ping, 'cpu': cpu}, last)
+        if records:
+            self.last_time = last
+        self.samples += len(records)
+
+    def summary(self, seconds, now):
+        store = self.store
+        lows = store.fps_lows(seconds, now)
+        return {
+            'host': self.host,
+            'game': self.game,
+            'samples': len(store.window('fps', seconds, now)),
+            'fps_avg': store.average('fps', seconds, now),
+            'fps_1low': lows['1%'],
+            'fps_01low': lows['0.1%'],
+            'ping_avg': store.average('ping', seconds, now),
+            'cpu_avg': store.average('cpu', seconds, now),
+            'lost_batches': self.lost_batches,
+            'age': now - self.last_seen,
+            'stale': now - self.last_seen > STALE_AFTER
+        }
+
+
+class _UdpIngest(asyncio.DatagramProtocol):
+    def __init__(self, collector):
+        self.collector = collector
+
+    def datagram_received(self, data, addr):
+        self.collector.ingest(data)
+
+
+class FleetCollector:
+    """asyncio collector on one port: UDP batches, TCP batch streams and
+    HTTP queries (/hosts, /worst?by=fps_1low&n=10&seconds=60)
+    """
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, capacity=HOST_CAPACITY, max_hosts=MAX_HOSTS):
+        self.host = host
+        self.port = port
+        self.capacity = capacity
+        self.max_hosts = max_hosts
+        self.hosts = {}
+        self.samples = 0
+        self.rejected = 0
+        self.evicted = 0
+        self._next_evict = 0.0
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+
+    def ingest(self, data, now=None):
+        """Add one batch; returns the number of samples"""
+        try:
+            seq, sent, host, game, records = decode_batch(data)
+        except ValueError:
+            self.rejected += 1
+            return 0
+        now = time.monotonic() if now is None else now
+        if now >= self._next_evict:
+            self._next_evict = now + EVICT_INTERVAL
+            self.evict(now)
+        aggregate = self.hosts.get(host)
+        if aggregate is None:
+            # A full table admits a new host only in place of stale ones
+            if len(self.hosts) >= self.max_hosts and not self.evict(now, STALE_AFTER):
+                self.rejected += 1
+                return 0
+            aggregate = self.hosts[host] = HostAggregate(host, self.capacity)
+        aggregate.ingest(seq, sent, game, records, now)
+        self.samples += len(records)
+        return len(records)
+
+    def evict(self, now=None, idle=EVICT_AFTER):
+        """Drop hosts silent for more than `idle` seconds; returns how many"""
+        now = time.monotonic() if now is None else now
+        gone = [host for host, aggregate in self.hosts.items() if now - aggregate.last_seen > idle]
+        for host in gone:
+            del self.hosts[host]
+        self.evicted += len(gone)
+        return len(gone)
+
+    def host_summaries(self, seconds=60.0, now=None):
+        now = time.monotonic() if now is None else now
+        return [aggregate.summary(seconds, now) for aggregate in list(self.hosts.values())]
+
+    def worst(self, by='fps_1low', count=10, seconds=60.0, now=None):
+        """The `count` worst hosts by a RANKINGS key over the last `seconds`"""
+        key, higher_is_worse = RANKINGS[by]
+        summaries = [s for s in self.host_summaries(seconds, now) if s['samples']]
+        if by.startswith('fps'):
+            # Hosts without a frame source report FPS 0 (not measured); they are not slow
+            summaries = [s for s in summaries if s['fps_avg'] > 0]
+        summaries.sort(key=key, reverse=higher_is_worse)
+        return summaries[:count]
+
+    async def _handle_tcp(self, reader, writer):
+        try:
+            head = await reader.readexactly(4)
+            if head == MAGIC:
+                while True:
+                    length = FRAME_LENGTH.unpack(await reader.readexactly(4))[0]
+                    self.ingest(await reader.readexactly(length))
+            elif head == b'GET ':
+                await self._handle_http(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_http(self, reader, writer):
+        request = await reader.readuntil(b'\r\n\r\n')
+        target = request.split(b' ', 1)[0].decode('latin-1')
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            seconds = float(query.get('seconds', 60))
+            if url.path == '/hosts':
+                body, status = self.host_summaries(seconds), "200 OK"
+            elif url.path == '/worst':
+                body = self.worst(query.get('by', 'fps_1low'), int(query.get('n', 10)), seconds)
+                status = "200 OK"
+            else:
+                body, status = {'error': 'not found'}, "404 Not Found"
+        except (KeyError, ValueError) as e:
+            body, status = {'error': f"bad query: {e}"}, "400 Bad Request"
+        payload = json.dumps(body).encode('utf-8')
+        writer.write(f"HTTP/1.0 {status}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+        await writer.drain()
+
+    async def serve(self):
+        """Run until stop(); usable directly with asyncio.run"""
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpIngest(self), local_addr=(self.host, self.port))
+        sock = transport.get_extra_info('socket')
+        try:
+            # Bursts from many agents arrive faster than one loop iteration
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+        self._loop = loop
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            transport.close()
+            server.close()
+            await server.wait_closed()
+
+    def start(self):
+        """Serve on a background thread; returns once the port is bound"""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="FleetCollector", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    host, _, port = text.rpartition(':')
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def run_load_test(collector_addr, agents=100, rate=4.0, seconds=10.0, bad=10, transport='udp', batch_size=20):
+    """Drive many synthetic agents from one thread; `bad` of them run at low FPS"""
+    rng = random.Random(1)
+    fleet = [FleetAgent(collector_addr, host=f"station-{i:03d}", transport=transport,
+                        batch_size=batch_size, flush_interval=1.0) for i in range(agents)]
+    bad_hosts = {agent.host for agent in fleet[:bad]}
+    interval = 1.0 / rate
+    start = time.monotonic()
+    next_tick = start
+    ticks = 0
+    while time.monotonic() - start < seconds:
+        now = time.time()
+        for agent in fleet:
+            base = 60.0 if agent.host in bad_hosts else 140.0
+            agent.add({'game': 'CS2', 'fps': max(1.0, rng.gauss(base, 8.0)), 'ping': rng.gauss(25.0, 2.0),
+                       'cpu': rng.uniform(30.0, 70.0), 'memory': 50.0, 'network': 20.0}, now)
+        ticks += 1
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+    for agent in fleet:
+        agent.close()
+    return {
+        'agents': agents,
+        'samples_sent': sum(agent.sent for agent in fleet),
+        'samples_dropped': sum(agent.dropped for agent in fleet),
+        'offered_samples_per_s': agents * ticks / (time.monotonic() - start),
+        'bad_hosts': sorted(bad_hosts)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS fleet collector / load test")
+    sub = parser.add_subparsers(dest='command', required=True)
+    collector = sub.add_parser('collector', help="run the collector")
+    collector.add_argument('--bind', default='0.0.0.0')
+    collector.add_argument('--port', type=int, default=DEFAULT_PORT)
+    collector.add_argument('--max-hosts', type=int, default=MAX_HOSTS)
+    load = sub.add_parser('loadtest', help="simulate many agents on this machine")
+    load.add_argument('--collector', default=None, help="HOST:PORT (default: start one in-process)")
+    load.add_argument('--agents', type=int, default=100)
+    load.add_argument('--rate', type=float, default=4.0, help="samples per second per agent")
+    load.add_argument('--seconds', type=float, default=10.0)
+    load.add_argument('--bad', type=int, default=10, help="agents simulating low FPS")
+    load.add_argument('--transport', choices=('udp', 'tcp'), default='udp')
+    args = parser.parse_args(argv)
+
+    if args.command == 'collector':
+        server = FleetCollector(args.bind, args.port, max_hosts=args.max_hosts)
+        print(f"Kolektor: udp/tcp {args.bind}:{args.port}, zapytania http://{args.bind}:{args.port}/worst",
+              file=sys.stderr)
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    server = None
+    if args.collector:
+        address = parse_address(args.collector)
+    else:
+        server = FleetCollector('127.0.0.1', 0).start()
+        address = ('127.0.0.1', server.port)
+    result = run_load_test(address, args.agents, args.rate, args.seconds, args.bad, args.transport)
+    if server is not None:
+        time.sleep(0.5)
+        worst = server.worst('fps_1low', args.bad, seconds=args.seconds + 5)
+        result['collector_samples'] = server.samples
+        result['lost_batches'] = sum(a.lost_batches for a in server.hosts.values())
+        result['worst_hosts'] = [s['host'] for s in worst]
+        result['worst_match_bad'] = sorted(result['worst_hosts']) == result['bad_hosts']
+        server.stop()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
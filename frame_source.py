@@ -0,0 +1,228 @@
+import os
+import random
+import threading
+from array import array
+
+from metrics_store import percentile, low_average
+
+# Frame-time column names used by PresentMon (1.x / 2.x) and MangoHud logs
+FRAME_TIME_COLUMNS = ('MsBetweenPresents', 'msBetweenPresents', 'FrameTime', 'frametime')
+
+
+class FrameTimeStats:
+    """Rolling window of per-frame times (ms) with FPS and frame-time statistics"""
+
+    def __init__(self, capacity=8192):
+        self.capacity = capacity
+        self.frames = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.head = 0
+        self.total_frames = 0
+        self.peak = 0.0
+
+    def extend(self, frame_times):
+        frames, cap, head = self.frames, self.capacity, self.head
+        for ft in frame_times:
+            frames[head] = ft
+            head += 1
+            if head == cap:
+                head = 0
+        n = len(frame_times)
+        if n:
+            self.peak = max(self.peak, max(frame_times))
+        self.head = head
+        self.count = min(cap, self.count + n)
+        self.total_frames += n
+
+    def recent(self, seconds=1.0):
+        """Return frame times covering the last `seconds` of play, newest first"""
+        budget = seconds * 1000.0
+        frames, cap = self.frames, self.capacity
+        out = array('d')
+        i = self.head
+        spent = 0.0
+        for _ in range(self.count):
+            i = i - 1 if i else cap - 1
+            ft = frames[i]
+            out.append(ft)
+            spent += ft
+            if spent >= budget:
+                break
+        return out
+
+    def take_peak(self):
+        """Slowest frame (ms) since the previous call; single-frame spikes
+        vanish in averaged FPS but not here"""
+        peak, self.peak = self.peak, 0.0
+        return peak
+
+    def fps(self, seconds=1.0):
+        frames = self.recent(seconds)
+        total = sum(frames)
+        return len(frames) * 1000.0 / total if total > 0 else 0.0
+
+    def summary(self, seconds=5.0):
+        """FPS, frame-time percentiles and 1%/0.1% lows over the last `seconds`"""
+        frames = self.recent(seconds)
+        total = sum(frames)
+        if not frames or total <= 0:
+            return {'fps': 0.0, 'frametime_p50': 0.0, 'frametime_p99': 0.0,
+                    '1%': 0.0, '0.1%': 0.0, 'frames': 0}
+        ordered = sorted(frames)
+        # Lows are the FPS of the slowest frames, i.e. the high end of frame times
+        slowest = ordered[::-1]
+        return {
+            'fps': len(frames) * 1000.0 / total,
+            'frametime_p50': percentile(ordered, 50),
+            'frametime_p99': percentile(ordered, 99),
+            '1%': 1000.0 / low_average(slowest, 0.01),
+            '0.1%': 1000.0 / low_average(slowest, 0.001),
+            'frames': len(frames)
+        }
+
+
+class FrameTimeSource:
+    """Base class for anything that yields per-frame times in milliseconds"""
+
+    def __init__(self):
+        self.stats = FrameTimeStats()
+
+    def read_new_frames(self):
+        """Return frame times that arrived since the last call"""
+        raise NotImplementedError
+
+    def poll(self):
+        """Ingest new frames into the rolling stats; returns how many arrived"""
+        frames = self.read_new_frames()
+        if frames:
+            self.stats.extend(frames)
+        return len(frames)
+
+    def close(self):
+        pass
+
+
+class CsvFrameTimeReader(FrameTimeSource):
+    """Tails a PresentMon/MangoHud-style CSV log, parsing only newly appended bytes"""
+
+    def __init__(self, path, column=None):
+        super().__init__()
+        self.path = path
+        self.columns = (column,) if column else FRAME_TIME_COLUMNS
+        self.column_index = None
+        self.offset = 0
+        self._partial = b''
+        self._file = None
+        self._inode = None
+
+    def _open(self):
+        self._file = open(self.path, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self.offset = 0
+        self._partial = b''
+        self.column_index = None
+
+    def _rotated(self):
+        """True if the log was truncated or replaced since we opened it"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_ino != self._inode or st.st_size < self.offset
+
+    def _find_header(self, line):
+        names = [c.strip() for c in line.decode('utf-8', 'replace').split(',')]
+        for column in self.columns:
+            if column in names:
+                self.column_index = names.index(column)
+                return
+
+    def read_new_frames(self):
+        try:
+            if self._file is None or self._rotated():
+                self.close()
+                self._open()
+            self._file.seek(self.offset)
+            data = self._file.read()
+        except OSError:
+            return array('d')
+        if not data:
+            return array('d')
+        self.offset += len(data)
+
+        lines = (self._partial + data).split(b'\n')
+        # Keep an unterminated last line for the next poll
+        self._partial = lines.pop()
+
+        frames = array('d')
+        index = self.column_index
+        for line in lines:
+            if index is None:
+                # MangoHud logs have a preamble before the real header
+                self._find_header(line)
+                index = self.column_index
+                continue
+            fields = line.split(b',', index + 1)
+            if len(fields) <= index:
+                continue
+            try:
+                frames.append(float(fields[index]))
+            except ValueError:
+                continue
+        return frames
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SyntheticFrameLog:
+    """Writes a PresentMon-style CSV log, for testing the reader without a game"""
+
+    HEADER = "Application,ProcessID,SwapChainAddress,Runtime,SyncInterval,PresentFlags,Dropped,TimeInSeconds,MsBetweenPresents\n"
+
+    def __init__(self, path, fps=500, jitter=0.1, stutter_chance=0.0, seed=None):
+        self.path = path
+        self.fps = fps
+        self.jitter = jitter
+        self.stutter_chance = stutter_chance
+        self.random = random.Random(seed)
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        with open(self.path, 'w') as f:
+            f.write(self.HEADER)
+
+    def next_frame_time(self):
+        ft = 1000.0 / self.fps
+        ft *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        if self.stutter_chance and self.random.random() < self.stutter_chance:
+            ft *= self.random.uniform(3, 8)
+        return ft
+
+    def write_frames(self, n):
+        """Append n frames in one write; returns the frame times written"""
+        frame_times = [self.next_frame_time() for _ in range(n)]
+        rows = []
+        for ft in frame_times:
+            self.elapsed += ft / 1000.0
+            rows.append(f"game.exe,1234,0x0,DXGI,0,0,0,{self.elapsed:.6f},{ft:.3f}\n")
+        with open(self.path, 'a') as f:
+            f.write(''.join(rows))
+        return frame_times
+
+    def start(self, batch_interval=0.05):
+        """Append frames in real time on a background thread"""
+        def run():
+            while not self._stop.wait(batch_interval):
+                self.write_frames(max(1, int(self.fps * batch_interval)))
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="SyntheticFrameLog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
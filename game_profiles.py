@@ -0,0 +1,159 @@
+import json
+import os
+import time
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+DEFAULT_PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_profiles.json")
+
+# Linux truncates /proc comm names to 15 characters
+TRUNCATED_NAME_LENGTH = 15
+
+# FPS range used for games without one in their profile
+DEFAULT_FPS_RANGE = (60, 120)
+
+
+class GameProfile:
+    def __init__(self, name, executables=(), fps_range=None, endpoints=None, settings=None):
+        self.name = name
+        self.executables = tuple(exe.lower() for exe in executables)
+        self.fps_range = tuple(fps_range) if fps_range else DEFAULT_FPS_RANGE
+        self.endpoints = [tuple(ep) for ep in endpoints] if endpoints else None
+        self.settings = dict(settings or {})
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def check_entry(entry, index):
+    """Raise ValueError unless a 'games' entry has the expected types"""
+    where = f"games[{index}]"
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where}: expected a table, got {type(entry).__name__}")
+    name = entry.get('name')
+    if not isinstance(name, str) or not name:
+        raise ValueError(f"{where}: 'name' must be a non-empty string")
+    where = f"{where} ({name})"
+    executables = entry.get('executables', ())
+    if not isinstance(executables, (list, tuple)) or not all(isinstance(exe, str) for exe in executables):
+        raise ValueError(f"{where}: 'executables' must be a list of strings")
+    fps_range = entry.get('fps_range')
+    if fps_range is not None and not (isinstance(fps_range, (list, tuple)) and len(fps_range) == 2
+                                      and all(_is_int(v) for v in fps_range) and 0 < fps_range[0] <= fps_range[1]):
+        raise ValueError(f"{where}: 'fps_range' must be [min, max] positive integers")
+    endpoints = entry.get('endpoints')
+    if endpoints is not None:
+        if not isinstance(endpoints, (list, tuple)):
+            raise ValueError(f"{where}: 'endpoints' must be a list")
+        for ep in endpoints:
+            if not (isinstance(ep, (list, tuple)) and len(ep) == 3 and isinstance(ep[0], str)
+                    and _is_int(ep[1]) and ep[2] in ('tcp', 'udp')):
+                raise ValueError(f"{where}: endpoints must be [host, port, 'tcp'|'udp']")
+    if not isinstance(entry.get('settings', {}), dict):
+        raise ValueError(f"{where}: 'settings' must be a table")
+
+
+def load_profiles(path):
+    """Read a JSON or TOML profile file into a list of GameProfile
+
+    Raises ValueError for malformed files and entries.
+    """
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise RuntimeError("TOML profiles need Python 3.11+ (tomllib)")
+        with open(path, 'rb') as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    games = data.get('games', ()) if isinstance(data, dict) else None
+    if not isinstance(games, (list, tuple)):
+        raise ValueError("'games' must be a list of game tables")
+    for index, entry in enumerate(games):
+        check_entry(entry, index)
+    return [
+        GameProfile(entry['name'], entry.get('executables', ()), entry.get('fps_range'),
+                    entry.get('endpoints'), entry.get('settings'))
+        for entry in games
+    ]
+
+
+def compile_index(profiles):
+    """Build exact-name and truncated-prefix indexes: lower-case name -> profile"""
+    exact = {}
+    prefixes = {}
+    for profile in profiles:
+        for exe in profile.executables:
+            stem = exe[:-4] if exe.endswith('.exe') else exe
+            exact.setdefault(exe, profile)
+            exact.setdefault(stem, profile)
+            # Truncated names ("fortniteclient-") can only be resolved by prefix
+            if len(stem) > TRUNCATED_NAME_LENGTH:
+                prefixes.setdefault(stem[:TRUNCATED_NAME_LENGTH], profile)
+    return exact, prefixes
+
+
+class GameProfileDB:
+    """Game profiles from a JSON/TOML file, compiled for O(1) executable lookup
+
+    The file is re-read only when its mtime changes; maybe_reload() checks at
+    most once every `check_interval` seconds.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILES_PATH, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.profiles = {}
+        self.version = 0
+        self.error = None
+        self._exact = {}
+        self._prefixes = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """Load the file now; on error the previous profiles stay active"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            profiles = load_profiles(self.path)
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            self.error = str(e)
+            return False
+        self._exact, self._prefixes = compile_index(profiles)
+        self.profiles = {p.name: p for p in profiles}
+        self._mtime = mtime
+        self.error = None
+        self.version += 1
+        return True
+
+    def maybe_reload(self):
+        """Reload if the file changed; returns True when profiles were replaced"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        return self.reload()
+
+    def match(self, proc_name):
+        """Resolve a process name to its GameProfile, or None"""
+        if not proc_name:
+            return None
+        name = proc_name.lower()
+        profile = self._exact.get(name)
+        if profile is None and len(name) == TRUNCATED_NAME_LENGTH:
+            profile = self._prefixes.get(name)
+        return profile
+
+    def get(self, game):
+        return self.profiles.get(game)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Luna FPS headless mode
+Runs the performance monitor without a GUI and streams metrics as NDJSON,
+optionally serving a Prometheus text endpoint on localhost.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from performance_monitor import PerformanceMonitor
+
+# Prometheus metric name -> (metrics key, help text)
+PROMETHEUS_METRICS = {
+    'luna_fps': ('fps', 'Frames per second'),
+    'luna_ping_ms': ('ping', 'Median RTT to game endpoints in ms'),
+    'luna_cpu_percent': ('cpu', 'System CPU usage in percent'),
+    'luna_cpu_core_max_percent': ('cpu_core_max', 'Usage of the busiest core in percent'),
+    'luna_memory_percent': ('memory', 'System memory usage in percent'),
+    'luna_memory_stall_percent': ('memory_stall', 'Share of the last 10 s some task stalled on memory (PSI)'),
+    'luna_network_ms': ('network', 'Median RTT to general endpoints in ms'),
+    'luna_net_recv_bytes_per_second': ('net_recv', 'Received bytes per second over all NICs'),
+    'luna_net_sent_bytes_per_second': ('net_sent', 'Sent bytes per second over all NICs'),
+    'luna_sample_overhead_seconds': ('overhead', 'Time spent collecting the last sample')
+}
+
+
+def format_prometheus(metrics):
+    """Render a metrics dict in the Prometheus text exposition format"""
+    lines = []
+    game = str(metrics.get('game', '-')).replace('\\', '\\\\').replace('"', '\\"')
+    for name, (key, help_text) in PROMETHEUS_METRICS.items():
+        if key not in metrics:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f'{name}{{game="{game}"}} {float(metrics[key])}')
+    lines.append("# TYPE luna_samples_total counter")
+    lines.append(f"luna_samples_total {metrics.get('seq', 0)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Serves the latest sample at /metrics on a background HTTP server"""
+
+    def __init__(self, host='127.0.0.1', port=9464):
+        self.latest = {}
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = format_prometheus(exporter.latest).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, name="MetricsExporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def publish(self, metrics):
+        # Swap the reference; readers never see a half-built dict
+        self.latest = metrics
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class HeadlessRunner:
+    """Samples the monitor at a fixed rate within a CPU overhead budget
+
+    If the measured collection time exceeds `budget` (fraction of one core),
+    the sample period is stretched until it fits again.
+    """
+
+    def __init__(self, monitor, rate=1.0, budget=0.01, out=None, exporter=None, boosts=None, recorder=None,
+                 agent=None):
+        self.monitor = monitor
+        self.period = 1.0 / rate
+        self.min_period = self.period
+        self.budget = budget
+        self.out = out
+        self.exporter = exporter
+        self.recorder = recorder
+        self.agent = agent
+        self.boosts = boosts or {}
+        self.seq = 0
+        self.overhead_avg = 0.0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def sample(self):
+        """Collect, publish and write one sample; returns it"""
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        metrics = self.monitor.get_metrics(self.boosts)
+        overhead = time.perf_counter() - start
+        cpu_time = time.process_time() - cpu_start
+
+        self.seq += 1
+        metrics['ts'] = time.time()
+        metrics['seq'] = self.seq
+        metrics['overhead'] = overhead
+        # Exponential moving average of CPU cost per sample; the first sample
+        # starts the sampler/prober threads and is not representative
+        if self.seq == 2:
+            self.overhead_avg = cpu_time
+        elif self.seq > 2:
+            self.overhead_avg = 0.9 * self.overhead_avg + 0.1 * cpu_time
+        self.adjust_period()
+
+        if self.exporter is not None:
+            self.exporter.publish(metrics)
+        if self.recorder is not None:
+            self.recorder.record(metrics, self.boosts, metrics['ts'])
+        if self.agent is not None:
+            self.agent.add(metrics, metrics['ts'])
+        if self.out is not None:
+            self.out.write(json.dumps(metrics, separators=(',', ':')) + "\n")
+            self.out.flush()
+        return metrics
+
+    def adjust_period(self):
+        """Stretch or relax the sample period to keep overhead within budget"""
+        if not self.budget:
+            return
+        needed = self.overhead_avg / self.budget
+        self.period = max(self.min_period, needed)
+
+    def run(self, duration=None):
+        end = time.monotonic() + duration if duration else None
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            next_tick += self.period
+            now = time.monotonic()
+            if end is not None and now >= end:
+                break
+            if next_tick < now:
+                # Fell behind: don't burst to catch up
+                next_tick = now
+            self._stop.wait(next_tick - now)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS headless monitor")
+    parser.add_argument('--rate', type=float, default=1.0, help="samples per second (default 1)")
+    parser.add_argument('--output', default='-', help="NDJSON output file, '-' for stdout, '' to disable")
+    parser.add_argument('--prometheus-port', type=int, default=0,
+                        help="serve Prometheus text on 127.0.0.1:PORT/metrics (0 = off)")
+    parser.add_argument('--budget', type=float, default=1.0,
+                        help="max monitor CPU cost in percent of one core (default 1)")
+    parser.add_argument('--duration', type=float, default=None, help="stop after N seconds")
+    parser.add_argument('--frame-log', default=None, help="PresentMon/MangoHud CSV log to tail for FPS")
+    parser.add_argument('--record', default=None, help="append samples to a binary session file (.lrec)")
+    parser.add_argument('--fleet', default=None, metavar='HOST:PORT', help="push samples to a fleet collector")
+    parser.add_argument('--fleet-transport', choices=('udp', 'tcp'), default='udp')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    monitor = PerformanceMonitor()
+    if args.frame_log:
+        from frame_source import CsvFrameTimeReader
+        monitor.set_frame_source(CsvFrameTimeReader(args.frame_log))
+
+    out = None
+    if args.output == '-':
+        out = sys.stdout
+    elif args.output:
+        out = open(args.output, 'a', buffering=1)
+
+    exporter = None
+    if args.prometheus_port:
+        exporter = MetricsExporter(port=args.prometheus_port).start()
+        print(f"Prometheus: http://127.0.0.1:{exporter.port}/metrics", file=sys.stderr)
+
+    recorder = None
+    if args.record:
+        from session_recorder import SessionRecorder
+        recorder = SessionRecorder(args.record)
+
+    agent = None
+    if args.fleet:
+        from fleet import FleetAgent, parse_address
+        agent = FleetAgent(parse_address(args.fleet), transport=args.fleet_transport)
+
+    runner = HeadlessRunner(monitor, rate=args.rate, budget=args.budget / 100.0, out=out, exporter=exporter,
+                            recorder=recorder, agent=agent)
+    try:
+        runner.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if recorder is not None:
+            recorder.close()
+        if agent is not None:
+            agent.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+        print(f"Średni koszt próbki: {runner.overhead_avg * 1000:.2f} ms CPU", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
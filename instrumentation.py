@@ -0,0 +1,172 @@
+import collections
+import cProfile
+import os
+import sys
+import threading
+import time
+
+# Histogram buckets are powers of two in microseconds: bucket b holds < 2**b us
+HISTOGRAM_BUCKETS = 32
+
+
+class StageHistogram:
+    """Log2-bucketed latency histogram with O(1) recording"""
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns):
+        self.buckets[min(HISTOGRAM_BUCKETS - 1, (elapsed_ns // 1000).bit_length())] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def percentile_us(self, pct):
+        """Upper bound (us) of the bucket containing the given percentile"""
+        if not self.count:
+            return 0
+        target = self.count * pct / 100.0
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return 1 << bucket
+        return 1 << (HISTOGRAM_BUCKETS - 1)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000.0 if self.count else 0.0,
+            'p50_us': self.percentile_us(50),
+            'p95_us': self.percentile_us(95),
+            'p99_us': self.percentile_us(99),
+            'max_us': self.max_ns / 1000.0
+        }
+
+
+class Instrumentation:
+    """Per-stage timers for the monitor cycle
+
+    Usage: t = instr.begin(); ...; t = instr.lap('stage', t). While disabled,
+    begin/lap return immediately without reading the clock.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self._profile = None
+        self._profile_lock = threading.Lock()
+
+    def begin(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def lap(self, name, start):
+        """Record the time since `start` under `name`; returns the new start"""
+        if not self.enabled:
+            return 0
+        now = time.perf_counter_ns()
+        # 0: begin() ran while disabled, so there is no start time to measure from
+        if start:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = StageHistogram()
+            histogram.record(now - start)
+        return now
+
+    def reset(self):
+        self.stages = {}
+
+    def snapshot(self):
+        """Return {stage: summary dict} for every recorded stage"""
+        return {name: hist.summary() for name, hist in list(self.stages.items())}
+
+    def request_cprofile(self, seconds, path):
+        """Profile the next `seconds` of instrumented cycles with cProfile into `path`
+
+        Returns an Event set once the profile is written, or None if another
+        capture is still pending.
+        """
+        with self._profile_lock:
+            if self._profile is not None:
+                return None
+            self._profile = {'profiler': cProfile.Profile(), 'until': None,
+                             'seconds': seconds, 'path': path, 'done': threading.Event()}
+            return self._profile['done']
+
+    def cancel_cprofile(self, done):
+        """Drop the capture that returned `done` if it never completed"""
+        with self._profile_lock:
+            if self._profile is not None and self._profile['done'] is done:
+                self._profile = None
+
+    def profile_cycle_start(self):
+        """Called by the monitored loop at the start of each cycle
+
+        Returns the profile it enabled, to be passed to profile_cycle_end.
+        """
+        profile = self._profile
+        if profile is None:
+            return None
+        if profile['until'] is None:
+            profile['until'] = time.monotonic() + profile['seconds']
+        try:
+            profile['profiler'].enable()
+        except ValueError:
+            # Another profiler is active in this thread
+            return None
+        return profile
+
+    def profile_cycle_end(self, profile):
+        if profile is None:
+            return
+        profile['profiler'].disable()
+        if profile['until'] is None or time.monotonic() < profile['until']:
+            return
+        with self._profile_lock:
+            if self._profile is not profile:
+                return
+            self._profile = None
+        profile['profiler'].dump_stats(profile['path'])
+        profile['done'].set()
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads via sys._current_frames()
+
+    Output is in collapsed-stack format ("a;b;c count"), readable by flamegraph tools.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+    def capture(self, seconds):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return self
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
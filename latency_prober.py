@@ -0,0 +1,255 @@
+import asyncio
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+
+# (host, port, protocol) endpoints for general network latency; never reported
+# as game ping
+DEFAULT_ENDPOINTS = [
+    ('1.1.1.1', 443, 'tcp'),
+    ('8.8.8.8', 443, 'tcp')
+]
+
+
+def summarize(rtts):
+    """Median, jitter and loss of a window of RTTs in ms (None = lost probe)"""
+    received = [r for r in rtts if r is not None]
+    if not rtts:
+        return {'median': 0.0, 'jitter': 0.0, 'loss': 0.0, 'samples': 0}
+    jitter = 0.0
+    if len(received) > 1:
+        # Mean absolute difference between consecutive replies (RFC 3550 style)
+        jitter = sum(abs(b - a) for a, b in zip(received, received[1:])) / (len(received) - 1)
+    return {
+        'median': statistics.median(received) if received else 0.0,
+        'jitter': jitter,
+        'loss': 100.0 * (len(rtts) - len(received)) / len(rtts),
+        'samples': len(rtts)
+    }
+
+
+def combine(summaries):
+    """Group summary from per-endpoint summaries
+
+    Median and jitter come from the endpoint with the lowest median (the one a
+    client would use); loss and samples cover every endpoint. Mixing endpoints
+    in one window would turn the gap between hosts into jitter.
+    """
+    summaries = [s for s in summaries if s['samples']]
+    if not summaries:
+        return summarize(())
+    answering = [s for s in summaries if s['loss'] < 100.0]
+    best = min(answering, key=lambda s: s['median']) if answering else summaries[0]
+    samples = sum(s['samples'] for s in summaries)
+    return {
+        'median': best['median'],
+        'jitter': best['jitter'],
+        'loss': sum(s['loss'] * s['samples'] for s in summaries) / samples,
+        'samples': samples
+    }
+
+
+class _UdpEchoClient(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.waiters = {}
+
+    def datagram_received(self, data, addr):
+        waiter = self.waiters.pop(data, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(time.perf_counter())
+
+
+class LatencyProber:
+    """Measures TCP-connect / UDP-echo RTTs on a private asyncio loop thread
+
+    Endpoints are grouped (e.g. 'game' and 'network'); every round probes all
+    endpoints concurrently and keeps a sliding window of results per endpoint.
+    """
+
+    def __init__(self, interval=1.0, window=30, timeout=1.0):
+        self.interval = interval
+        self.window = window
+        self.timeout = timeout
+        self._groups = {'network': list(DEFAULT_ENDPOINTS)}
+        self._results = {}
+        self._addresses = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._stop = None
+        self._seq = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_endpoints(self, group, endpoints):
+        """Replace the endpoints of a group; its window starts over"""
+        with self._lock:
+            if endpoints:
+                self._groups[group] = list(endpoints)
+            else:
+                self._groups.pop(group, None)
+            self._results.pop(group, None)
+
+    def set_game(self, game, endpoints=None):
+        """Probe a game's endpoints as the 'game' group
+
+        Games without known endpoints get no 'game' group, so they report no
+        ping instead of the RTT to general network endpoints.
+        """
+        endpoints = [tuple(ep) for ep in endpoints] if endpoints and game != "-" else None
+        with self._lock:
+            if self._groups.get('game') == endpoints:
+                return
+        self.set_endpoints('game', endpoints)
+
+    def stats(self, group):
+        """Return median/jitter/loss for a group over the sliding windows"""
+        with self._lock:
+            windows = [list(w) for w in self._results.get(group, {}).values()]
+        return combine(summarize(rtts) for rtts in windows)
+
+    def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        self._thread = threading.Thread(target=self._run, name="LatencyProber", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=self.timeout + self.interval + 1)
+        self._thread = None
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._probe_forever())
+        finally:
+            self._loop.close()
+
+    async def _probe_forever(self):
+        while not self._stop.is_set():
+            await self.probe_round()
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def probe_round(self):
+        """Probe every endpoint of every group concurrently and record the results"""
+        with self._lock:
+            groups = {g: list(eps) for g, eps in self._groups.items()}
+        jobs = [(g, ep) for g, eps in groups.items() for ep in eps]
+        # One failing probe must not end the loop thread
+        rtts = await asyncio.gather(*(self._probe(ep) for _, ep in jobs), return_exceptions=True)
+        rtts = [None if isinstance(rtt, BaseException) else rtt for rtt in rtts]
+        with self._lock:
+            for (group, endpoint), rtt in zip(jobs, rtts):
+                if group not in self._groups:
+                    continue
+                windows = self._results.setdefault(group, {})
+                window = windows.get(endpoint)
+                if window is None:
+                    window = windows[endpoint] = deque(maxlen=self.window)
+                window.append(rtt)
+
+    async def _resolve(self, host, port, proto):
+        key = (host, port, proto)
+        address = self._addresses.get(key)
+        if address is None:
+            kind = socket.SOCK_STREAM if proto == 'tcp' else socket.SOCK_DGRAM
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=kind)
+            address = self._addresses[key] = infos[0][4]
+        return address
+
+    async def _probe(self, endpoint):
+        host, port, proto = endpoint
+        try:
+            address = await asyncio.wait_for(self._resolve(host, port, proto), self.timeout)
+            if proto == 'udp':
+                return await self._probe_udp(address)
+            return await self._probe_tcp(address)
+        except (OSError, asyncio.TimeoutError):
+            return None
+
+    async def _probe_tcp(self, address):
+        start = time.perf_counter()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address[0], address[1]), self.timeout)
+        rtt = (time.perf_counter() - start) * 1000.0
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return rtt
+
+    async def _probe_udp(self, address):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(_UdpEchoClient, remote_addr=address)
+        try:
+            self._seq += 1
+            payload = b'luna-%d' % self._seq
+            waiter = loop.create_future()
+            protocol.waiters[payload] = waiter
+            start = time.perf_counter()
+            transport.sendto(payload)
+            received = await asyncio.wait_for(waiter, self.timeout)
+            return (received - start) * 1000.0
+        finally:
+            transport.close()
+
+
+class _UdpEchoServer(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+
+class EchoServer:
+    """Local TCP+UDP echo server on 127.0.0.1, for testing the prober"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="EchoServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    @property
+    def endpoints(self):
+        return [(self.host, self.port, 'tcp'), (self.host, self.port, 'udp')]
+
+    async def _handle(self, reader, writer):
+        writer.close()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        transport, _ = self._loop.run_until_complete(
+            self._loop.create_datagram_endpoint(_UdpEchoServer, local_addr=(self.host, self.port)))
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            transport.close()
+            server.close()
+            self._loop.close()
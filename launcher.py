@@ -7,20 +7,36 @@ Uruchamia główną aplikację boostującą FPS
 import sys
 import os
 import subprocess
+import importlib.util
 
-def check_dependencies():
-    """Sprawdź czy wymagane biblioteki są zainstalowane"""
-    try:
-        import tkinter
-        import psutil
-        return True
-    except ImportError as e:
-        print(f"Brak wymaganej biblioteki: {e}")
-        print("Instalacja wymaganych pakietów...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "psutil"])
+def check_dependencies(gui=True):
+    """Sprawdź czy wymagane biblioteki są zainstalowane (bez ich importowania)"""
+    required = ["psutil"]
+    if gui:
+        required.insert(0, "tkinter")
+    missing = [name for name in required if importlib.util.find_spec(name) is None]
+    if not missing:
         return True
+    
+    print(f"Brak wymaganej biblioteki: {', '.join(missing)}")
+    if "tkinter" in missing:
+        # tkinter jest częścią Pythona, nie da się go zainstalować przez pip
+        return False
+    print("Instalacja wymaganych pakietów...")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
+    return True
 
 def main():
+    # Tryb bez GUI: python launcher.py --headless [opcje headless.py]
+    # Monitor w osobnym procesie: python launcher.py --monitor-process
+    # Prawdziwe FPS z logu PresentMon/MangoHud: python launcher.py --frame-log PLIK.csv
+    if "--headless" in sys.argv[1:]:
+        if not check_dependencies(gui=False):
+            return
+        import headless
+        headless.main([arg for arg in sys.argv[1:] if arg != "--headless"])
+        return
+
     print("=== FPS BOOSTER PRO ===")
     print("Uruchamianie aplikacji...")
     
@@ -30,8 +46,9 @@ def main():
     
     # Uruchom główną aplikację
     try:
-        from main import FPSBoosterApp
-        app = FPSBoosterApp()
+        from main import LunaFPSApp, parse_args
+        args = parse_args(sys.argv[1:])
+        app = LunaFPSApp(monitor_process=args.monitor_process, frame_log=args.frame_log)
         app.run()
     except Exception as e:
         print(f"Błąd uruchamiania: {e}")
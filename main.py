@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
+import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import os
+import sys
 import threading
 import time
-from performance_monitor import PerformanceMonitor
+from collections import deque
+from ui_dispatcher import UIDispatcher
+from animation_clock import AnimationClock
+from task_engine import TaskEngine
+from instrumentation import SamplingProfiler
 
 class ModernCard(tk.Frame):
     def __init__(self, parent, title="", description="", **kwargs):
@@ -28,42 +35,321 @@ class ModernCard(tk.Frame):
                 desc_label.pack(anchor='w')
 
 class ProgressBarCustom(tk.Frame):
-    def __init__(self, parent, **kwargs):
+    # Animation speed in percent per second
+    ANIMATION_SPEED = 400
+
+    def __init__(self, parent, clock=None, **kwargs):
         super().__init__(parent, bg='#1a1a1a', **kwargs)
         self.value = 0
+        self.displayed = 0
+        self.clock = clock
+        self.suspended = False
+        self._drawn = (0, '#333333')
         self.setup_progress()
     
     def setup_progress(self):
         self.canvas = tk.Canvas(self, height=8, bg='#333333', highlightthickness=0)
         self.canvas.pack(fill='x', padx=2, pady=2)
+        # One persistent item, moved and recoloured in place
+        self.bar = self.canvas.create_rectangle(0, 0, 0, 8, fill='#333333', outline="")
+        self.canvas.bind('<Configure>', lambda e: self.update_progress())
+        self.bind('<Destroy>', self._on_destroy)
         
     def set_value(self, value):
         self.value = max(0, min(100, value))
+        if self.suspended:
+            # Hidden: remember the value, draw it on resume
+            self.displayed = self.value
+        elif self.clock is None:
+            self.displayed = self.value
+            self.update_progress()
+        elif self.displayed != self.value:
+            self.clock.add(self)
+
+    def tick(self, dt):
+        """Advance the displayed value towards the target; True while moving"""
+        step = self.ANIMATION_SPEED * dt
+        diff = self.value - self.displayed
+        if abs(diff) <= step:
+            self.displayed = self.value
+        else:
+            self.displayed += step if diff > 0 else -step
         self.update_progress()
+        return self.displayed != self.value
     
     def update_progress(self):
-        self.canvas.delete("all")
         width = self.canvas.winfo_width()
-        if width > 1:
-            fill_width = int(width * self.value / 100)
-            color = '#ff6b35' if self.value >= 80 else '#00ff00' if self.value > 0 else '#333333'
-            if fill_width > 0:
-                self.canvas.create_rectangle(0, 0, fill_width, 8, fill=color, outline="")
-        self.after(50, self.update_progress)
+        if width <= 1:
+            return
+        fill_width = int(width * self.displayed / 100)
+        color = '#ff6b35' if self.displayed >= 80 else '#00ff00' if self.displayed > 0 else '#333333'
+        if (fill_width, color) == self._drawn:
+            return
+        if fill_width != self._drawn[0]:
+            self.canvas.coords(self.bar, 0, 0, fill_width, 8)
+        if color != self._drawn[1]:
+            self.canvas.itemconfig(self.bar, fill=color)
+        self._drawn = (fill_width, color)
+
+    def suspend(self):
+        """Stop animating while the bar is hidden"""
+        self.suspended = True
+        self.displayed = self.value
+        if self.clock is not None:
+            self.clock.remove(self)
+
+    def resume(self):
+        self.suspended = False
+        self.update_progress()
+
+    def _on_destroy(self, event):
+        if event.widget is self and self.clock is not None:
+            self.clock.remove(self)
+
+class MetricsGraph(tk.Frame):
+    """Live multi-series line graph on one Canvas
+
+    Every series is one persistent line item updated with coords(). History
+    is decimated to a [min, max] pair per pixel column, so spikes stay
+    visible; columns cover fixed runs of samples, so a new sample only
+    touches the last column. Redraws happen only after new samples, at most
+    once per AnimationClock frame.
+    """
+    # (key, label, colour, fixed maximum or None for auto-scale)
+    SERIES = (
+        ('fps', 'FPS', '#00ff00', None),
+        ('frametime', 'ms', '#ffd700', None),
+        ('ping', 'Ping', '#00aaff', None),
+        ('cpu', 'CPU %', '#ff6b35', 100.0)
+    )
+
+    def __init__(self, parent, clock=None, capacity=3600, height=120, **kwargs):
+        super().__init__(parent, bg='#1a1a1a', **kwargs)
+        self.clock = clock
+        self.height = height
+        self.suspended = False
+        self.capacity = capacity
+        self.history = {key: deque(maxlen=capacity) for key, _, _, _ in self.SERIES}
+        # Per-series [min, max] columns, rebuilt from history when the width changes
+        self.columns = {key: deque() for key, _, _, _ in self.SERIES}
+        self.bucket_size = 1
+        self.count = 0
+        # Samples pushed from any thread, drained on the Tk thread
+        self.pending = deque()
+        self.dirty = False
+        self._width = 0
+        self.setup_graph()
+
+    def setup_graph(self):
+        self.canvas = tk.Canvas(self, height=self.height, bg='#111111', highlightthickness=0)
+        self.canvas.pack(fill='x', padx=2, pady=2)
+        self.lines = {}
+        self.legend = {}
+        for i, (key, label, color, _) in enumerate(self.SERIES):
+            self.lines[key] = self.canvas.create_line(0, 0, 0, 0, fill=color, width=1)
+            self.legend[key] = self.canvas.create_text(6 + i * 90, 4, anchor='nw', fill=color,
+                                                       font=("Segoe UI", 8), text=label)
+        self.canvas.bind('<Configure>', lambda e: self.request_redraw())
+        self.bind('<Destroy>', self._on_destroy)
+
+    def push(self, metrics):
+        """Queue one metrics sample; safe from any thread"""
+        fps = metrics.get('fps') or 0
+        self.pending.append((fps, 1000.0 / fps if fps > 0 else 0.0, metrics.get('ping') or 0, metrics.get('cpu') or 0))
+
+    def request_redraw(self):
+        """Schedule a redraw on the next frame; call on the Tk thread"""
+        self.dirty = True
+        if self.suspended:
+            return
+        if self.clock is None:
+            self.redraw()
+        else:
+            self.clock.add(self)
+
+    def tick(self, dt):
+        self.redraw()
+        return False
+
+    def _add(self, columns, index, value):
+        if index % self.bucket_size == 0 or not columns:
+            columns.append([value, value])
+        else:
+            column = columns[-1]
+            if value < column[0]:
+                column[0] = value
+            elif value > column[1]:
+                column[1] = value
+
+    def _rebuild(self, width):
+        """Re-bucket the whole history for a new canvas width"""
+        self._width = width
+        self.bucket_size = max(1, -(-self.capacity // width))
+        for key, values in self.history.items():
+            columns = self.columns[key] = deque(maxlen=width)
+            first = self.count - len(values)
+            for i, value in enumerate(values):
+                self._add(columns, first + i, value)
+
+    def redraw(self):
+        pending = self.pending
+        while pending:
+            for (key, _, _, _), value in zip(self.SERIES, pending.popleft()):
+                value = float(value)
+                self.history[key].append(value)
+                if self._width:
+                    self._add(self.columns[key], self.count, value)
+            self.count += 1
+        width = self.canvas.winfo_width()
+        if width <= 1:
+            return
+        if width != self._width:
+            self._rebuild(width)
+        elif not self.dirty:
+            return
+        self.dirty = False
+        top, bottom = 18, self.height - 2
+        for key, label, _, fixed_max in self.SERIES:
+            columns = self.columns[key]
+            if not columns:
+                continue
+            scale_max = fixed_max or max(max(hi for _, hi in columns) * 1.1, 1.0)
+            y_scale = (bottom - top) / scale_max
+            x_step = width / max(1, len(columns) - 1)
+            points = []
+            for i, (lo, hi) in enumerate(columns):
+                x = i * x_step
+                points += (x, bottom - lo * y_scale, x, bottom - hi * y_scale)
+            self.canvas.coords(self.lines[key], points)
+            self.canvas.itemconfig(self.legend[key], text=f"{label} {self.history[key][-1]:.0f}")
+
+    def suspend(self):
+        """Stop redrawing while hidden; samples keep accumulating"""
+        self.suspended = True
+        if self.clock is not None:
+            self.clock.remove(self)
+
+    def resume(self):
+        self.suspended = False
+        if self.pending or self.dirty:
+            self.request_redraw()
+
+    def _on_destroy(self, event):
+        if event.widget is self and self.clock is not None:
+            self.clock.remove(self)
+
+class StageStatsPanel(tk.Frame):
+    """Live table of per-stage timings from an Instrumentation, refreshed while visible"""
+
+    def __init__(self, parent, get_instrumentation, interval_ms=1000, **kwargs):
+        super().__init__(parent, bg='#1a1a1a', **kwargs)
+        self.get_instrumentation = get_instrumentation
+        self.interval_ms = interval_ms
+        self.suspended = False
+        self._after_id = None
+        self.table = tk.Label(self, text="", font=("Consolas", 10), justify='left',
+                              fg='#ffffff', bg='#1a1a1a', anchor='w')
+        self.table.pack(fill='x')
+        self.refresh()
+
+    def refresh(self):
+        self._after_id = None
+        instr = self.get_instrumentation()
+        rows = [f"{'Etap':<14}{'n':>8}{'śr. µs':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'max µs':>10}"]
+        if instr is None or not instr.enabled:
+            rows.append("Pomiary wyłączone")
+        else:
+            for name, stats in sorted(instr.snapshot().items()):
+                rows.append(f"{name:<14}{stats['count']:>8}{stats['mean_us']:>10.1f}{stats['p50_us']:>8}"
+                            f"{stats['p95_us']:>8}{stats['p99_us']:>8}{stats['max_us']:>10.1f}")
+        text = "\n".join(rows)
+        if text != self.table.cget('text'):
+            self.table.config(text=text)
+        if not self.suspended:
+            self._after_id = self.after(self.interval_ms, self.refresh)
+
+    def suspend(self):
+        self.suspended = True
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+    def resume(self):
+        self.suspended = False
+        if self._after_id is None:
+            self.refresh()
+
 
 class LunaFPSApp:
-    def __init__(self):
+    # Tabs pre-built in the background once the window is on screen
+    TAB_IDS = ("podstawowe", "gry", "zaawansowane", "developer")
+    # How often the UI reads the out-of-process monitor's shared-memory bus
+    BUS_POLL_MS = 50
+    # Replayed samples between two updates of the replay statistics
+    REPLAY_STATS_EVERY = 20
+
+    def __init__(self, monitor_process=False, frame_log=None):
+        # Startup milestones (perf_counter seconds), see startup_benchmark.py
+        self.startup_marks = {'init': time.perf_counter()}
+        self.first_metric_posted = False
         self.root = tk.Tk()
         self.root.title("Luna FPS — FPS Booster & 0 Delay Optimizer")
         self.root.geometry("1400x900")
         self.root.configure(bg='#0a0a0a')
         self.root.resizable(True, True)
         
-        self.monitor = PerformanceMonitor()
+        # Created after the first paint, see finish_startup
+        self.monitor = None
+        # With monitor_process the scheduler runs in a child process (see metrics_bus.py)
+        self.use_monitor_process = monitor_process
+        self.monitor_process = None
+        self.bus_seq = None
+        # PresentMon/MangoHud CSV log the FPS come from; without one FPS is not measured
+        self.frame_log = frame_log
+        # All widget updates from worker threads go through this dispatcher
+        self.ui = UIDispatcher(self.root)
+        self.clock = AnimationClock(self.root)
         self.setup_variables()
         self.setup_styles()
         self.setup_ui()
-        self.start_monitoring()
+        self.ui.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Show the window first; heavy initialisation runs once it is painted
+        self.root.after_idle(self.finish_startup)
+
+    def mark_startup(self, name):
+        self.startup_marks.setdefault(name, time.perf_counter())
+
+    def finish_startup(self):
+        """Second startup stage: monitor, tasks and hidden tabs after the first paint"""
+        self.root.update_idletasks()
+        self.mark_startup('first_paint')
+        
+        # psutil, asyncio etc. are only imported here
+        from performance_monitor import PerformanceMonitor
+        from optimization_tasks import register_default_tasks
+        self.monitor = PerformanceMonitor()
+        register_default_tasks(self.engine, self.monitor)
+        if self.use_monitor_process:
+            from metrics_bus import MonitorProcess
+            self.monitor_process = MonitorProcess(tuple(self.game_boosts), frame_log=self.frame_log).start()
+            self.poll_bus()
+        else:
+            if self.frame_log:
+                from frame_source import CsvFrameTimeReader
+                self.monitor.set_frame_source(CsvFrameTimeReader(self.frame_log))
+            self.start_monitoring()
+        self.mark_startup('monitor_ready')
+        
+        self.root.after_idle(self.prebuild_tabs)
+
+    def prebuild_tabs(self):
+        """Build one hidden tab per idle callback so input stays responsive"""
+        for tab_name in self.TAB_IDS:
+            if tab_name not in self.tab_frames:
+                self.build_tab(tab_name)
+                self.root.after_idle(self.prebuild_tabs)
+                return
 
     def setup_variables(self):
         # Task progress tracking
@@ -88,11 +374,22 @@ class LunaFPSApp:
             'fpsStabilizer': tk.BooleanVar()
         }
         
-        # Auto boost
-        self.auto_boost = tk.BooleanVar()
+        # Plain-dict snapshot of boosts, safe to read from the monitor thread
+        self.boost_state = {k: v.get() for k, v in self.game_boosts.items()}
+        for boost_id, var in self.game_boosts.items():
+            var.trace_add('write', lambda *_, b=boost_id, v=var: self.boost_state.__setitem__(b, v.get()))
         
-        # Running tasks
-        self.running_tasks = set()
+        # Auto boost; the policy reacts to anomalies in the metrics stream
+        self.auto_boost = tk.BooleanVar()
+        self.auto_boost_policy = None
+
+        # Session recording / replay (developer tab)
+        self.recorder = None
+        self.player = None
+
+        # Optimization task engine; callbacks arrive on worker threads.
+        # Tasks are registered in finish_startup once the monitor exists.
+        self.engine = TaskEngine(on_progress=self.on_task_progress, on_finish=self.on_task_finish)
 
     def setup_styles(self):
         self.colors = {
@@ -167,6 +464,10 @@ class LunaFPSApp:
                                 command=self.toggle_auto_boost)
         auto_cb.pack(anchor='w')
         
+        self.auto_boost_status = tk.Label(hero_content, text="", font=("Segoe UI", 10),
+                                          fg=self.colors['muted'], bg=self.colors['card_bg'])
+        self.auto_boost_status.pack(anchor='w')
+        
         # Quick action buttons
         buttons_frame = tk.Frame(hero_content, bg=self.colors['card_bg'])
         buttons_frame.pack(fill='x', pady=20)
@@ -196,7 +497,7 @@ class LunaFPSApp:
                                   fg=self.colors['text'], bg=self.colors['card_bg'])
         self.game_label.pack(anchor='w', pady=2)
         
-        self.fps_label = tk.Label(left_col, text="📊 FPS: 60", font=("Segoe UI", 12, "bold"),
+        self.fps_label = tk.Label(left_col, text="📊 FPS: -", font=("Segoe UI", 12, "bold"),
                                  fg=self.colors['accent'], bg=self.colors['card_bg'])
         self.fps_label.pack(anchor='w', pady=2)
         
@@ -208,7 +509,7 @@ class LunaFPSApp:
         right_col = tk.Frame(metrics_grid, bg=self.colors['card_bg'])
         right_col.pack(side='right', fill='both', expand=True)
         
-        self.cpu_label = tk.Label(right_col, text="🖥️ CPU: 0%", font=("Segoe UI", 10),
+        self.cpu_label = tk.Label(right_col, text="🖥️ CPU: 0%", font=("Segoe UI", 10), justify='left',
                                  fg=self.colors['text'], bg=self.colors['card_bg'])
         self.cpu_label.pack(anchor='w', pady=2)
         
@@ -216,9 +517,13 @@ class LunaFPSApp:
                                     fg=self.colors['text'], bg=self.colors['card_bg'])
         self.memory_label.pack(anchor='w', pady=2)
         
-        self.network_label = tk.Label(right_col, text="🌐 Network: 0ms", font=("Segoe UI", 10),
+        self.network_label = tk.Label(right_col, text="🌐 Network: 0ms", font=("Segoe UI", 10), justify='left',
                                      fg=self.colors['text'], bg=self.colors['card_bg'])
         self.network_label.pack(anchor='w', pady=2)
+        
+        # FPS / frame time / ping / CPU history
+        self.metrics_graph = MetricsGraph(perf_content, clock=self.clock)
+        self.metrics_graph.pack(fill='x', pady=(10, 0))
 
     def setup_tabs(self):
         # Tab container
@@ -244,30 +549,60 @@ class LunaFPSApp:
                            padx=20, pady=8, command=lambda t=tab_id: self.switch_tab(t))
             btn.pack(side='left', padx=(0, 5))
         
-        # Tab content area
+        # Tab content area; each tab gets its own frame, built on first visit
         self.tab_content = tk.Frame(tab_container, bg=self.colors['bg'])
         self.tab_content.pack(fill='both', expand=True)
+        self.tab_frames = {}
+        self.visible_tab = None
         
         # Initialize with basic tab
         self.switch_tab("podstawowe")
 
     def switch_tab(self, tab_name):
         self.current_tab.set(tab_name)
+        if tab_name == self.visible_tab:
+            return
         
-        # Clear current content
-        for widget in self.tab_content.winfo_children():
-            widget.destroy()
+        # Hide the current tab and pause its redraws; widgets stay alive
+        if self.visible_tab is not None:
+            previous = self.tab_frames[self.visible_tab]
+            previous.pack_forget()
+            self.set_tab_suspended(previous, True)
         
-        if tab_name == "podstawowe":
-            self.setup_basic_tab()
-        elif tab_name == "gry":
-            self.setup_games_tab()
-        elif tab_name == "zaawansowane":
-            self.setup_advanced_tab()
-        elif tab_name == "developer":
-            self.setup_developer_tab()
+        frame = self.tab_frames.get(tab_name)
+        if frame is None:
+            # Build lazily on first visit
+            frame = self.build_tab(tab_name)
+        self.set_tab_suspended(frame, False)
+        
+        frame.pack(fill='both', expand=True)
+        self.visible_tab = tab_name
+
+    def build_tab(self, tab_name):
+        """Build a tab into its own (hidden, suspended) frame"""
+        frame = tk.Frame(self.tab_content, bg=self.colors['bg'])
+        builders = {
+            "podstawowe": self.setup_basic_tab,
+            "gry": self.setup_games_tab,
+            "zaawansowane": self.setup_advanced_tab,
+            "developer": self.setup_developer_tab
+        }
+        builders[tab_name](frame)
+        self.tab_frames[tab_name] = frame
+        self.set_tab_suspended(frame, True)
+        return frame
+
+    def set_tab_suspended(self, frame, suspended):
+        """Suspend or resume periodic redraws of every widget in a tab"""
+        pending = [frame]
+        while pending:
+            widget = pending.pop()
+            handler = getattr(widget, 'suspend' if suspended else 'resume', None)
+            if handler is not None:
+                handler()
+            pending.extend(widget.winfo_children())
 
-    def setup_basic_tab(self):
+    def setup_basic_tab(self, parent):
         # Basic optimization tasks
         basic_tasks = [
             ('cpu', '🖥️ Optymalizacja procesora', 'Wyłącz zbędne procesy i podnieś priorytet gier'),
@@ -281,7 +616,7 @@ class LunaFPSApp:
         ]
         
         # Create grid
-        grid_frame = tk.Frame(self.tab_content, bg=self.colors['bg'])
+        grid_frame = tk.Frame(parent, bg=self.colors['bg'])
         grid_frame.pack(fill='both', expand=True)
         
         for i, (task_id, title, desc) in enumerate(basic_tasks):
@@ -295,15 +630,15 @@ class LunaFPSApp:
         for i in range(2):
             grid_frame.columnconfigure(i, weight=1)
 
-    def setup_games_tab(self):
-        game_text = tk.Label(self.tab_content, text="🎮 Profile gier (w rozwoju)", 
+    def setup_games_tab(self, parent):
+        game_text = tk.Label(parent, text="🎮 Profile gier (w rozwoju)", 
                             font=("Segoe UI", 16, "bold"), fg=self.colors['accent'], 
                             bg=self.colors['bg'])
         game_text.pack(pady=50)
 
-    def setup_advanced_tab(self):
+    def setup_advanced_tab(self, parent):
         # Game boosts section
-        boosts_card = ModernCard(self.tab_content, "Tryb zaawansowany", "Skalowanie, wygładzenie i pro‑funkcje")
+        boosts_card = ModernCard(parent, "Tryb zaawansowany", "Skalowanie, wygładzenie i pro‑funkcje")
         boosts_card.pack(fill='x', pady=(0, 20))
         
         boosts_content = tk.Frame(boosts_card, bg=self.colors['card_bg'])
@@ -335,11 +670,215 @@ class LunaFPSApp:
                                activebackground=self.colors['card_bg'])
             cb.pack(anchor='w')
 
-    def setup_developer_tab(self):
-        dev_text = tk.Label(self.tab_content, text="⚙️ Tryb deweloperski (w rozwoju)", 
-                           font=("Segoe UI", 16, "bold"), fg=self.colors['warning'], 
-                           bg=self.colors['bg'])
-        dev_text.pack(pady=50)
+    def setup_developer_tab(self, parent):
+        profiler_card = ModernCard(parent, "Profiler", "Czas etapów cyklu monitora i przechwytywanie profilu")
+        profiler_card.pack(fill='x', pady=(0, 20))
+        
+        profiler_content = tk.Frame(profiler_card, bg=self.colors['card_bg'])
+        profiler_content.pack(fill='x', padx=15, pady=(0, 15))
+        
+        self.instrumentation_enabled = tk.BooleanVar(value=False)
+        cb = tk.Checkbutton(profiler_content, text="⏱️ Włącz pomiary etapów", variable=self.instrumentation_enabled,
+                           font=("Segoe UI", 12), fg=self.colors['text'],
+                           bg=self.colors['card_bg'], selectcolor=self.colors['border'],
+                           activebackground=self.colors['card_bg'], command=self.toggle_instrumentation)
+        cb.pack(anchor='w', pady=(0, 10))
+        
+        StageStatsPanel(profiler_content, lambda: self.monitor and self.monitor.instrumentation).pack(fill='x')
+        
+        # Profile capture
+        capture_frame = tk.Frame(profiler_content, bg=self.colors['card_bg'])
+        capture_frame.pack(fill='x', pady=(10, 0))
+        
+        tk.Label(capture_frame, text="Czas (s):", font=("Segoe UI", 10),
+                 fg=self.colors['muted'], bg=self.colors['card_bg']).pack(side='left')
+        self.profile_seconds = tk.Spinbox(capture_frame, from_=1, to=60, width=4, font=("Segoe UI", 10))
+        self.profile_seconds.delete(0, 'end')
+        self.profile_seconds.insert(0, "5")
+        self.profile_seconds.pack(side='left', padx=(5, 15))
+        
+        for text, mode in (("cProfile", 'cprofile'), ("Próbkowanie", 'sampling')):
+            btn = tk.Button(capture_frame, text=text, font=("Segoe UI", 9, "bold"),
+                           bg=self.colors['hero'], fg='white', relief='flat', padx=15, pady=5,
+                           command=lambda m=mode: self.capture_profile(m))
+            btn.pack(side='left', padx=(0, 5))
+        
+        self.profile_status = tk.Label(profiler_content, text="", font=("Segoe UI", 9),
+                                       fg=self.colors['muted'], bg=self.colors['card_bg'])
+        self.profile_status.pack(anchor='w', pady=(5, 0))
+        
+        # Real FPS source
+        frames_card = ModernCard(parent, "Źródło FPS", "Log czasów klatek z PresentMon lub MangoHud (CSV)")
+        frames_card.pack(fill='x', pady=(0, 20))
+        
+        frames_content = tk.Frame(frames_card, bg=self.colors['card_bg'])
+        frames_content.pack(fill='x', padx=15, pady=(0, 15))
+        
+        btn = tk.Button(frames_content, text="Wybierz log...", font=("Segoe UI", 9, "bold"),
+                       bg=self.colors['hero'], fg='white', relief='flat', padx=15, pady=5,
+                       command=self.choose_frame_log)
+        btn.pack(anchor='w')
+        
+        self.frame_log_status = tk.Label(frames_content, font=("Segoe UI", 9), justify='left',
+                                         text=f"Log: {self.frame_log}" if self.frame_log else "Brak logu: FPS nie są mierzone",
+                                         fg=self.colors['muted'], bg=self.colors['card_bg'])
+        self.frame_log_status.pack(anchor='w', pady=(5, 0))
+        
+        # Session recording, replay and A/B comparison
+        session_card = ModernCard(parent, "Sesje", "Nagrywanie, odtwarzanie i porównywanie sesji (A/B)")
+        session_card.pack(fill='x', pady=(0, 20))
+        
+        session_content = tk.Frame(session_card, bg=self.colors['card_bg'])
+        session_content.pack(fill='x', padx=15, pady=(0, 15))
+        
+        self.recording_enabled = tk.BooleanVar(value=False)
+        cb = tk.Checkbutton(session_content, text="⏺️ Nagrywaj sesję", variable=self.recording_enabled,
+                           font=("Segoe UI", 12), fg=self.colors['text'],
+                           bg=self.colors['card_bg'], selectcolor=self.colors['border'],
+                           activebackground=self.colors['card_bg'], command=self.toggle_recording)
+        cb.pack(anchor='w', pady=(0, 10))
+        
+        session_buttons = tk.Frame(session_content, bg=self.colors['card_bg'])
+        session_buttons.pack(fill='x')
+        
+        for text, command in (("Odtwórz...", self.replay_session), ("Zatrzymaj", self.stop_replay),
+                              ("Porównaj A/B...", self.compare_sessions)):
+            btn = tk.Button(session_buttons, text=text, font=("Segoe UI", 9, "bold"),
+                           bg=self.colors['hero'], fg='white', relief='flat', padx=15, pady=5,
+                           command=command)
+            btn.pack(side='left', padx=(0, 5))
+        
+        self.session_status = tk.Label(session_content, text="", font=("Segoe UI", 9), justify='left',
+                                       fg=self.colors['muted'], bg=self.colors['card_bg'])
+        self.session_status.pack(anchor='w', pady=(5, 0))
+
+    def toggle_instrumentation(self):
+        if self.monitor is None:
+            return
+        enabled = self.instrumentation_enabled.get()
+        if enabled:
+            self.monitor.instrumentation.reset()
+        self.monitor.instrumentation.enabled = enabled
+        self.ui.instrumentation = self.monitor.instrumentation if enabled else None
+
+    def capture_profile(self, mode):
+        """Capture a cProfile of the monitor loop or a sampling profile of all threads"""
+        if self.monitor is None:
+            return
+        try:
+            seconds = max(1, int(self.profile_seconds.get()))
+        except ValueError:
+            seconds = 5
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.ui.post(self.profile_status, text=f"Przechwytywanie {seconds} s...")
+        
+        def capture():
+            if mode == 'cprofile':
+                path = f"luna_profile_{stamp}.prof"
+                # Probes run at least every few seconds; wait for one after the window closes
+                done = self.monitor.instrumentation.request_cprofile(seconds, path)
+                if done is None:
+                    self.ui.post(self.profile_status, text="Poprzednie profilowanie jeszcze trwa")
+                    return
+                if not done.wait(seconds + 5):
+                    self.monitor.instrumentation.cancel_cprofile(done)
+                    self.ui.post(self.profile_status, text="Brak cykli monitora do profilowania")
+                    return
+            else:
+                path = SamplingProfiler().capture(seconds).dump(f"luna_stacks_{stamp}.txt")
+            self.ui.post(self.profile_status, text=f"Zapisano: {os.path.abspath(path)}")
+        
+        threading.Thread(target=capture, daemon=True).start()
+
+    def choose_frame_log(self):
+        path = filedialog.askopenfilename(filetypes=[("Logi PresentMon/MangoHud", "*.csv"), ("Wszystkie pliki", "*.*")])
+        if path:
+            self.set_frame_log(path)
+
+    def set_frame_log(self, path):
+        """Take FPS from a frame-time log (tailed while the game appends to it)"""
+        self.frame_log = path
+        if self.monitor_process is not None:
+            # The monitor lives in the child process: restart it with the log
+            from metrics_bus import MonitorProcess
+            process, self.monitor_process = self.monitor_process, None
+            process.stop()
+            self.bus_seq = None
+            self.monitor_process = MonitorProcess(tuple(self.game_boosts), frame_log=path).start()
+        elif self.monitor is not None:
+            from frame_source import CsvFrameTimeReader
+            self.monitor.set_frame_source(CsvFrameTimeReader(path))
+        self.ui.post(self.frame_log_status, text=f"Log: {os.path.abspath(path)}")
+
+    def toggle_recording(self):
+        from session_recorder import SessionRecorder
+        if self.recording_enabled.get():
+            path = f"luna_session_{time.strftime('%Y%m%d-%H%M%S')}.lrec"
+            self.recorder = SessionRecorder(path)
+            self.ui.post(self.session_status, text=f"Nagrywanie: {os.path.abspath(path)}")
+        elif self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+            self.ui.post(self.session_status, text=f"Zapisano {recorder.count} próbek: {os.path.abspath(recorder.path)}")
+
+    def replay_session(self):
+        """Play a recorded session through the monitor labels instead of live data"""
+        from session_recorder import SessionFile, SessionPlayer
+        from metrics_store import MetricsStore
+        path = filedialog.askopenfilename(filetypes=[("Sesje Luna FPS", "*.lrec")])
+        if not path:
+            return
+        try:
+            session = SessionFile(path)
+        except (OSError, ValueError) as e:
+            self.ui.post(self.session_status, text=f"Błąd: {e}")
+            return
+        self.stop_replay()
+        # The player closes the session when playback ends
+        store = MetricsStore(capacity=max(1, len(session)))
+        title = f"Odtwarzanie: {os.path.basename(path)} ({len(session)} próbek, {session.duration / 60:.0f} min)"
+        self.player = SessionPlayer(session, lambda metrics: self.on_replay_sample(metrics, store, title),
+                                    store=store, on_done=lambda: self.on_replay_done(store))
+        self.player.start()
+        self.ui.post(self.session_status, text=title)
+
+    def on_replay_sample(self, metrics, store, title):
+        # Called on the player thread after the sample is stored; the running
+        # statistics cover the last minute, as they would live
+        from session_recorder import describe_summary
+        self.publish_metrics(metrics)
+        if len(store) % self.REPLAY_STATS_EVERY == 0:
+            stats = describe_summary(store.summary(seconds=60))
+            self.ui.post(self.session_status, text=f"{title}\nOstatnia minuta: {stats}")
+
+    def on_replay_done(self, store):
+        from session_recorder import describe_summary
+        text = "Odtwarzanie zakończone"
+        if len(store):
+            text += f"\nCała odtworzona część: {describe_summary(store.summary())}"
+        self.ui.post(self.session_status, text=text)
+
+    def stop_replay(self):
+        if self.player is not None:
+            player, self.player = self.player, None
+            player.stop()
+
+    def compare_sessions(self):
+        from session_recorder import SessionFile, compare_sessions, describe_comparison
+        paths = filedialog.askopenfilenames(title="Wybierz sesję A i B", filetypes=[("Sesje Luna FPS", "*.lrec")])
+        if len(paths) != 2:
+            self.ui.post(self.session_status, text="Wybierz dokładnie dwie sesje")
+            return
+        
+        def compare():
+            try:
+                with SessionFile(paths[0]) as a, SessionFile(paths[1]) as b:
+                    text = describe_comparison(compare_sessions(a, b))
+            except (OSError, ValueError) as e:
+                text = f"Błąd: {e}"
+            self.ui.post(self.session_status, text=f"A: {os.path.basename(paths[0])}\nB: {os.path.basename(paths[1])}\n{text}")
+        
+        threading.Thread(target=compare, daemon=True).start()
 
     def create_task_card(self, parent, task_id, title, description):
         card = ModernCard(parent, title, description)
@@ -348,7 +887,7 @@ class LunaFPSApp:
         progress_frame = tk.Frame(card, bg=self.colors['card_bg'])
         progress_frame.pack(fill='x', padx=15, pady=10)
         
-        progress_bar = ProgressBarCustom(progress_frame)
+        progress_bar = ProgressBarCustom(progress_frame, clock=self.clock)
         progress_bar.pack(fill='x')
         
         # Store reference for updates
@@ -385,88 +924,204 @@ class LunaFPSApp:
         
         return card
 
+    def task_widgets(self, task_id):
+        """Return (progress_bar, status_label, run_btn) for a task, or Nones if not built"""
+        return (getattr(self, f'{task_id}_progress', None),
+                getattr(self, f'{task_id}_status', None),
+                getattr(self, f'{task_id}_run_btn', None))
+
+    def on_task_progress(self, task_id, fraction, message):
+        # Called from worker threads
+        progress_bar, status_label, _ = self.task_widgets(task_id)
+        if progress_bar is not None:
+            self.ui.call(progress_bar.set_value, int(fraction * 100))
+        if message and status_label is not None:
+            self.ui.post(status_label, text=message)
+
+    def on_task_finish(self, task_id, status, result):
+        # Called from worker threads
+        progress_bar, status_label, run_btn = self.task_widgets(task_id)
+        if status == 'done':
+            text = result if isinstance(result, str) else "Zakończono pomyślnie"
+            button = "Uruchom ponownie"
+        elif status == 'timeout':
+            text, button = "Przekroczono limit czasu", "Uruchom ponownie"
+        elif status == 'failed':
+            text, button = f"Błąd: {result}", "Uruchom ponownie"
+        else:
+            text, button = "Wyłączono", "Uruchom"
+            if progress_bar is not None:
+                self.ui.call(progress_bar.set_value, 0)
+        if status_label is not None:
+            self.ui.post(status_label, text=text)
+        if run_btn is not None:
+            self.ui.post(run_btn, text=button, state='normal')
+
+    def mark_task_started(self, task_id):
+        _, status_label, run_btn = self.task_widgets(task_id)
+        if status_label is not None:
+            self.ui.post(status_label, text="W trakcie...")
+        if run_btn is not None:
+            self.ui.post(run_btn, text="Pracuję", state='disabled')
+
     def run_task(self, task_id):
-        if task_id in self.running_tasks:
+        if task_id not in self.engine.specs or self.engine.is_running(task_id):
             return
-            
-        self.running_tasks.add(task_id)
-        progress_bar = getattr(self, f'{task_id}_progress')
-        status_label = getattr(self, f'{task_id}_status')
-        run_btn = getattr(self, f'{task_id}_run_btn')
-        
-        status_label.config(text="W trakcie...")
-        run_btn.config(text="Pracuję", state='disabled')
-        
-        def animate_progress():
-            for i in range(101):
-                progress_bar.set_value(i)
-                time.sleep(0.02)
-            
-            status_label.config(text="Zakończono pomyślnie")
-            run_btn.config(text="Uruchom ponownie", state='normal')
-            self.running_tasks.discard(task_id)
-            
-        threading.Thread(target=animate_progress, daemon=True).start()
+        self.mark_task_started(task_id)
+        self.engine.run(task_id)
 
     def disable_task(self, task_id):
-        if task_id in self.running_tasks:
-            self.running_tasks.discard(task_id)
+        if task_id in self.engine.specs:
+            self.engine.disable(task_id)
         
-        progress_bar = getattr(self, f'{task_id}_progress')
-        status_label = getattr(self, f'{task_id}_status')
-        run_btn = getattr(self, f'{task_id}_run_btn')
-        
-        progress_bar.set_value(0)
-        status_label.config(text="Wyłączono")
-        run_btn.config(text="Uruchom", state='normal')
+        progress_bar, status_label, run_btn = self.task_widgets(task_id)
+        self.ui.call(progress_bar.set_value, 0)
+        self.ui.post(status_label, text="Wyłączono")
+        self.ui.post(run_btn, text="Uruchom", state='normal')
 
     def run_all_optimizations(self):
         """Run all basic optimizations"""
-        if self.auto_boost.get():
-            tasks = ['cpu', 'gpu', 'ram', 'input', 'lowlatency', 'vsync', 'gamemode', 'cache']
-            for task in tasks:
-                if hasattr(self, f'{task}_progress'):
-                    self.run_task(task)
+        if self.auto_boost.get() and self.engine.specs:
+            task_ids = list(self.tasks)
+            for task_id in task_ids:
+                if not self.engine.is_running(task_id):
+                    self.mark_task_started(task_id)
+            # Independent tasks run in parallel, dependent ones after their prerequisites
+            self.engine.run_all(task_ids, on_complete=self.on_all_tasks_complete)
+
+    def on_all_tasks_complete(self, statuses):
+        # Tasks skipped because a prerequisite failed never reported a finish
+        for task_id, status in statuses.items():
+            if status == 'skipped':
+                _, status_label, run_btn = self.task_widgets(task_id)
+                if status_label is not None:
+                    self.ui.post(status_label, text="Pominięto")
+                if run_btn is not None:
+                    self.ui.post(run_btn, text="Uruchom", state='normal')
 
     def toggle_auto_boost(self):
         if self.auto_boost.get():
-            messagebox.showinfo("Auto Boost", "🚀 Auto Boost aktywowany!\nAutomatyczna optymalizacja uruchomiona.")
-            self.run_all_optimizations()
+            from anomaly_detector import AutoBoostPolicy
+            # Only tasks matching a detected problem run, each at most once per cooldown
+            self.auto_boost_policy = AutoBoostPolicy(self.run_task, self.engine.is_running,
+                                                     on_event=self.on_anomaly)
+            messagebox.showinfo("Auto Boost", "🚀 Auto Boost aktywowany!\n"
+                                "Optymalizacje uruchomią się po wykryciu problemów z wydajnością.")
         else:
+            self.auto_boost_policy = None
+            self.ui.post(self.auto_boost_status, text="")
             messagebox.showinfo("Auto Boost", "Auto Boost wyłączony.")
 
+    def on_anomaly(self, kind, event, tasks):
+        # Called on the monitor thread
+        from anomaly_detector import ANOMALY_LABELS
+        if event == 'start':
+            text = f"⚠️ Wykryto: {ANOMALY_LABELS[kind]}"
+            if tasks:
+                text += f" → {', '.join(tasks)}"
+            self.ui.post(self.auto_boost_status, text=text, fg=self.colors['warning'])
+        else:
+            self.ui.post(self.auto_boost_status, text=f"✅ Ustąpiło: {ANOMALY_LABELS[kind]}", fg=self.colors['muted'])
+
     def start_monitoring(self):
-        def update_loop():
-            while True:
-                boosts = {k: v.get() for k, v in self.game_boosts.items()}
-                metrics = self.monitor.get_metrics(boosts)
-                
-                # Update labels with colors
-                fps_color = self.colors['accent'] if metrics['fps'] >= 120 else self.colors['warning'] if metrics['fps'] >= 60 else self.colors['danger']
-                self.fps_label.config(text=f"📊 FPS: {metrics['fps']}", fg=fps_color)
-                
-                game_color = self.colors['warning'] if metrics['game'] != '-' else self.colors['muted']
-                self.game_label.config(text=f"🎮 Gra: {metrics['game']}", fg=game_color)
-                
-                ping_text = f"📡 Ping: {metrics['ping']}ms" if metrics['ping'] > 0 else "📡 Ping: -"
-                self.ping_label.config(text=ping_text)
-                
-                cpu_color = self.colors['danger'] if metrics['cpu'] >= 80 else self.colors['warning'] if metrics['cpu'] >= 60 else self.colors['text']
-                self.cpu_label.config(text=f"🖥️ CPU: {int(metrics['cpu'])}%", fg=cpu_color)
-                
-                mem_color = self.colors['danger'] if metrics['memory'] >= 80 else self.colors['warning'] if metrics['memory'] >= 60 else self.colors['text']
-                self.memory_label.config(text=f"💾 RAM: {int(metrics['memory'])}%", fg=mem_color)
-                
-                self.network_label.config(text=f"🌐 Network: {int(metrics['network'])}ms")
-                
-                time.sleep(2)
-
-        thread = threading.Thread(target=update_loop, daemon=True)
-        thread.start()
+        # Probes run on the monitor's adaptive scheduler: fast while a game is
+        # detected, backed off when idle. Samples arrive on the scheduler thread.
+        self.monitor.start_scheduler(lambda: dict(self.boost_state), self.on_live_sample)
+
+    def poll_bus(self):
+        """Read the monitor process's latest sample (Tk thread; never blocks)"""
+        process = self.monitor_process
+        if process is None:
+            return
+        bus = process.bus
+        bus.set_boosts(self.boost_state)
+        sample = bus.read(self.bus_seq)
+        if sample is not None:
+            self.bus_seq, metrics = sample
+            self.on_live_sample(metrics)
+        self.root.after(self.BUS_POLL_MS, self.poll_bus)
+
+    def on_close(self):
+        self.stop_replay()
+        if self.recorder is not None:
+            # Flush the records still buffered for a session recorded until exit
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
+        if self.monitor_process is not None:
+            process, self.monitor_process = self.monitor_process, None
+            process.stop()
+        self.root.destroy()
+
+    def on_live_sample(self, metrics):
+        # Called on the scheduler thread (Tk thread for the monitor process);
+        # a running replay owns the labels
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(metrics, self.boost_state)
+        policy = self.auto_boost_policy
+        if policy is not None:
+            policy.on_sample(metrics)
+        player = self.player
+        if player is None or not player.running:
+            self.publish_metrics(metrics)
+
+    def publish_metrics(self, metrics):
+        instr = self.monitor.instrumentation
+        t = instr.begin()
+        
+        # Update labels with colors
+        if metrics['fps'] > 0:
+            fps_color = self.colors['accent'] if metrics['fps'] >= 120 else self.colors['warning'] if metrics['fps'] >= 60 else self.colors['danger']
+            self.ui.post(self.fps_label, text=f"📊 FPS: {metrics['fps']}", fg=fps_color)
+        else:
+            # No frame-time log attached (Developer tab or --frame-log)
+            self.ui.post(self.fps_label, text="📊 FPS: - (brak źródła)", fg=self.colors['muted'])
+        
+        game_color = self.colors['warning'] if metrics['game'] != '-' else self.colors['muted']
+        self.ui.post(self.game_label, text=f"🎮 Gra: {metrics['game']}", fg=game_color)
+        
+        ping_text = f"📡 Ping: {metrics['ping']}ms" if metrics['ping'] > 0 else "📡 Ping: -"
+        self.ui.post(self.ping_label, text=ping_text)
+        
+        cpu_color = self.colors['danger'] if metrics['cpu'] >= 80 else self.colors['warning'] if metrics['cpu'] >= 60 else self.colors['text']
+        # The average hides one saturated core, so show the busiest one too
+        # (replayed sessions predate some keys, hence .get)
+        cpu_text = f"🖥️ CPU: {int(metrics['cpu'])}% (maks. rdzeń {int(metrics.get('cpu_core_max', 0))}%)"
+        if metrics.get('cpu_alert'):
+            cpu_text += f"\n⚠️ {metrics['cpu_alert']}"
+            cpu_color = self.colors['danger']
+        self.ui.post(self.cpu_label, text=cpu_text, fg=cpu_color)
+        
+        mem_color = self.colors['danger'] if metrics['memory'] >= 80 else self.colors['warning'] if metrics['memory'] >= 60 else self.colors['text']
+        mem_text = f"💾 RAM: {int(metrics['memory'])}%"
+        if metrics['memory_stall'] >= 1:
+            # Stalls matter more than the usage percentage
+            mem_text += f" (przestoje {metrics['memory_stall']:.0f}%)"
+            mem_color = self.colors['danger']
+        self.ui.post(self.memory_label, text=mem_text, fg=mem_color)
+        
+        net_text = f"🌐 Network: {int(metrics['network'])}ms · ↓ {metrics.get('net_recv', 0) / 1048576:.1f} MB/s"
+        if metrics.get('net_hog'):
+            # Only set while a game runs: the busiest background network user
+            net_text += f"\n📶 W tle: {metrics['net_hog']}"
+        self.ui.post(self.network_label, text=net_text)
+        self.metrics_graph.push(metrics)
+        self.ui.call(self.metrics_graph.request_redraw)
+        if not self.first_metric_posted:
+            self.first_metric_posted = True
+            self.ui.call(self.mark_startup, 'first_metric')
+        instr.lap('ui_post', t)
 
     def run(self):
         self.root.mainloop()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS")
+    parser.add_argument('--monitor-process', action='store_true', help="run the monitor in a separate process")
+    parser.add_argument('--frame-log', default=None, help="PresentMon/MangoHud CSV log to tail for FPS")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    app = LunaFPSApp()
+    args = parse_args()
+    app = LunaFPSApp(monitor_process=args.monitor_process, frame_log=args.frame_log)
     app.run()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+MAGIC = b'LMB2'
+
+# Layout of the shared block (all little-endian, fixed offsets):
+#   header   magic, writer pid, sequence (odd while a sample is being written)
+#   control  boost bitmask and stop flag, written by the UI
+#   sample   timestamp, numeric metrics, game name, CPU alert, top network process
+HEADER_STRUCT = struct.Struct('<4sIQ')
+CONTROL_STRUCT = struct.Struct('<II')
+NUMERIC_FIELDS = ('fps', 'ping', 'cpu', 'memory', 'memory_stall', 'cpu_core_max', 'network', 'jitter',
+                  'frametime_max', 'net_recv', 'net_sent')
+INT_FIELDS = ('fps', 'ping', 'network')
+SAMPLE_STRUCT = struct.Struct('<d' + 'd' * len(NUMERIC_FIELDS) + '64s160s64s')
+
+SEQ_OFFSET = 8
+CONTROL_OFFSET = HEADER_STRUCT.size
+SAMPLE_OFFSET = CONTROL_OFFSET + CONTROL_STRUCT.size
+BUS_SIZE = SAMPLE_OFFSET + SAMPLE_STRUCT.size
+
+SEQ_STRUCT = struct.Struct('<Q')
+MASK_STRUCT = struct.Struct('<I')
+
+# Give up reading after this many torn reads in a row (writer stuck mid-sample)
+READ_RETRIES = 100
+
+
+def _attach(name):
+    """Attach to an existing block; only its creator unlinks it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers the block again; processes started by
+        # multiprocessing share the creator's resource tracker, so that is a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+class MetricsBus:
+    """Single-writer metrics sample in shared memory, guarded by a seqlock
+
+    The writer makes the sequence odd, writes the sample and makes it even
+    again; readers copy the sample straight out of the block and retry if
+    the sequence moved meanwhile. No pickling, pipes or locks are involved,
+    so a busy writer can never block the reader.
+    """
+
+    def __init__(self, name=None, boost_names=()):
+        self.boost_names = tuple(boost_names)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=BUS_SIZE)
+            self.shm.buf[:BUS_SIZE] = bytes(BUS_SIZE)
+            HEADER_STRUCT.pack_into(self.shm.buf, 0, MAGIC, 0, 0)
+        else:
+            self.shm = _attach(name)
+            if bytes(self.shm.buf[:4]) != MAGIC:
+                self.shm.close()
+                raise ValueError(f"{name}: not a metrics bus")
+        self.buf = self.shm.buf
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def sequence(self):
+        return SEQ_STRUCT.unpack_from(self.buf, SEQ_OFFSET)[0]
+
+    def publish(self, metrics):
+        """Write one sample (single writer only)"""
+        seq = self.sequence
+        SEQ_STRUCT.pack_into(self.buf, SEQ_OFFSET, seq + 1)
+        SAMPLE_STRUCT.pack_into(
+            self.buf, SAMPLE_OFFSET, time.time(),
+            *(float(metrics.get(name, 0) or 0) for name in NUMERIC_FIELDS),
+            str(metrics.get('game', '-')).encode('utf-8')[:64],
+            str(metrics.get('cpu_alert', '')).encode('utf-8')[:160],
+            str(metrics.get('net_hog', '')).encode('utf-8')[:64])
+        HEADER_STRUCT.pack_into(self.buf, 0, MAGIC, os.getpid(), seq + 2)
+
+    def read(self, since=None):
+        """Return (sequence, metrics) of the latest sample, or None if there is
+        none yet, it is unchanged since `since`, or the writer is mid-write
+        """
+        for _ in range(READ_RETRIES):
+            before = self.sequence
+            if before == 0 or before == since:
+                return None
+            if before & 1:
+                continue
+            values = SAMPLE_STRUCT.unpack_from(self.buf, SAMPLE_OFFSET)
+            if self.sequence == before:
+                break
+        else:
+            return None
+        ts, *numbers, game, alert, hog = values
+        metrics = dict(zip(NUMERIC_FIELDS, numbers))
+        for name in INT_FIELDS:
+            metrics[name] = int(metrics[name])
+        metrics['game'] = game.rstrip(b'\0').decode('utf-8', 'replace')
+        metrics['cpu_alert'] = alert.rstrip(b'\0').decode('utf-8', 'replace')
+        metrics['net_hog'] = hog.rstrip(b'\0').decode('utf-8', 'replace')
+        metrics['ts'] = ts
+        return before, metrics
+
+    def set_boosts(self, boosts):
+        mask = 0
+        for bit, name in enumerate(self.boost_names):
+            if boosts.get(name):
+                mask |= 1 << bit
+        MASK_STRUCT.pack_into(self.buf, CONTROL_OFFSET, mask)
+
+    def boosts(self):
+        mask = MASK_STRUCT.unpack_from(self.buf, CONTROL_OFFSET)[0]
+        return {name: bool(mask >> bit & 1) for bit, name in enumerate(self.boost_names)}
+
+    def request_stop(self):
+        MASK_STRUCT.pack_into(self.buf, CONTROL_OFFSET + 4, 1)
+
+    @property
+    def stop_requested(self):
+        return MASK_STRUCT.unpack_from(self.buf, CONTROL_OFFSET + 4)[0] != 0
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def run_monitor_process(bus_name, boost_names, parent_pid, profiles_path=None, frame_log=None):
+    """Child process entry point: run the monitor scheduler, publish to the bus"""
+    import psutil
+    from performance_monitor import PerformanceMonitor
+
+    bus = MetricsBus(bus_name, boost_names)
+    monitor = PerformanceMonitor(profiles_path) if profiles_path else PerformanceMonitor()
+    if frame_log:
+        from frame_source import CsvFrameTimeReader
+        monitor.set_frame_source(CsvFrameTimeReader(frame_log))
+    scheduler = monitor.start_scheduler(bus.boosts, bus.publish)
+    try:
+        # Exit with the UI even if it died without asking us to stop
+        while not bus.stop_requested and psutil.pid_exists(parent_pid):
+            time.sleep(0.5)
+    finally:
+        scheduler.stop()
+        monitor.prober.stop()
+        bus.close()
+
+
+class MonitorProcess:
+    """PerformanceMonitor running in a separate process behind a MetricsBus
+
+    Process scans and probes then never hold the UI interpreter's GIL; the
+    UI polls bus.read() on its own schedule.
+    """
+
+    def __init__(self, boost_names=(), profiles_path=None, frame_log=None):
+        self.boost_names = tuple(boost_names)
+        self.profiles_path = profiles_path
+        self.frame_log = frame_log
+        self.bus = None
+        self.process = None
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        self.bus = MetricsBus(boost_names=self.boost_names)
+        # spawn: never fork a process that already runs Tk and worker threads
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(
+            target=run_monitor_process, name="LunaMonitor", daemon=True,
+            args=(self.bus.name, self.boost_names, os.getpid(), self.profiles_path, self.frame_log))
+        self.process.start()
+        return self
+
+    def stop(self, timeout=3.0):
+        if self.process is None:
+            return
+        self.bus.request_stop()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.process = None
+        self.bus.close()
+        self.bus = None
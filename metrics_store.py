@@ -0,0 +1,148 @@
+import bisect
+import math
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SERIES = ('fps', 'ping', 'cpu', 'memory', 'network')
+# Series where 0 means "not measured" (e.g. no frame source): left out of statistics
+UNMEASURED_ZERO = ('fps',)
+
+
+class SeriesRing:
+    """Preallocated array('d') ring buffer"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.count = 0
+        self.head = 0
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def ordered(self):
+        """Return the stored values oldest-first as a new array"""
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return self.data[self.head:] + self.data[:self.head]
+
+    def tail(self, n):
+        """Return the newest n values oldest-first"""
+        n = min(n, self.count)
+        if not n:
+            return array('d')
+        start = (self.head - n) % self.capacity
+        if start < self.head:
+            return self.data[start:self.head]
+        return self.data[start:] + self.data[:self.head]
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted sequence"""
+    n = len(sorted_values)
+    if not n:
+        return 0.0
+    rank = (n - 1) * pct / 100.0
+    lo = int(rank)
+    hi = min(lo + 1, n - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (rank - lo)
+
+
+def low_average(sorted_values, fraction):
+    """Average of the lowest `fraction` of an already sorted sequence (e.g. 1% low)"""
+    n = len(sorted_values)
+    if not n:
+        return 0.0
+    k = max(1, int(math.ceil(n * fraction)))
+    return sum(sorted_values[:k]) / k
+
+
+class MetricsStore:
+    """Bounded, constant-memory time series of monitor metrics
+
+    Every series shares one timestamp ring, so windows are found with a single
+    bisect and memory stays at capacity * 8 bytes per series.
+    """
+
+    def __init__(self, capacity=7200, series=SERIES):
+        self.capacity = capacity
+        self.series = tuple(series)
+        self.times = SeriesRing(capacity)
+        self.values = {name: SeriesRing(capacity) for name in self.series}
+
+    def __len__(self):
+        return self.times.count
+
+    def append(self, metrics, timestamp=None):
+        """Record one metrics dict; missing series are stored as 0"""
+        self.times.append(time.monotonic() if timestamp is None else timestamp)
+        for name, ring in self.values.items():
+            ring.append(float(metrics.get(name, 0) or 0))
+
+    def window(self, name, seconds=None, now=None):
+        """Return values of a series within the last `seconds` (all if None), oldest-first"""
+        if seconds is None:
+            return self.values[name].ordered()
+        now = time.monotonic() if now is None else now
+        times = self.times.ordered()
+        start = bisect.bisect_left(times, now - seconds)
+        return self.values[name].tail(len(times) - start)
+
+    def _sorted(self, name, seconds, now):
+        values = self.window(name, seconds, now)
+        if np is not None:
+            ordered = np.sort(np.frombuffer(values, dtype=np.float64))
+            if name in UNMEASURED_ZERO:
+                ordered = ordered[np.searchsorted(ordered, 0.0, side='right'):]
+            return ordered
+        ordered = sorted(values)
+        if name in UNMEASURED_ZERO:
+            ordered = ordered[bisect.bisect_right(ordered, 0.0):]
+        return ordered
+
+    def average(self, name, seconds=None, now=None):
+        values = self.window(name, seconds, now)
+        if np is not None:
+            values = np.frombuffer(values, dtype=np.float64)
+            if name in UNMEASURED_ZERO:
+                values = values[values > 0]
+            return float(values.mean()) if len(values) else 0.0
+        if name in UNMEASURED_ZERO:
+            values = [v for v in values if v > 0]
+        return sum(values) / len(values) if values else 0.0
+
+    def percentiles(self, name, pcts=(50, 95, 99), seconds=None, now=None):
+        """Return {pct: value} for a series over a window"""
+        ordered = self._sorted(name, seconds, now)
+        return {pct: float(percentile(ordered, pct)) for pct in pcts}
+
+    def fps_lows(self, seconds=None, now=None):
+        """Return the 1% and 0.1% low FPS (average of the slowest samples)"""
+        ordered = self._sorted('fps', seconds, now)
+        return {
+            '1%': float(low_average(ordered, 0.01)),
+            '0.1%': float(low_average(ordered, 0.001))
+        }
+
+    def summary(self, seconds=None, now=None):
+        """Average and p50/p95/p99 for every series plus FPS lows"""
+        result = {}
+        for name in self.series:
+            stats = self.percentiles(name, seconds=seconds, now=now)
+            result[name] = {
+                'avg': self.average(name, seconds, now),
+                'p50': stats[50],
+                'p95': stats[95],
+                'p99': stats[99]
+            }
+        if 'fps' in self.values:
+            result['fps'].update(self.fps_lows(seconds, now))
+        return result
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Luna FPS monitor benchmark
+Drives PerformanceMonitor against synthetic psutil process tables and the
+Tk update path, and prints machine-readable JSON results.
+"""
+
+import argparse
+import collections
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+# Records shaped like psutil's named tuples
+CpuTimes = collections.namedtuple('CpuTimes', 'user system idle iowait')
+NetIO = collections.namedtuple('NetIO', 'bytes_sent bytes_recv')
+Connection = collections.namedtuple('Connection', 'pid raddr')
+ThreadTimes = collections.namedtuple('ThreadTimes', 'id user_time system_time')
+IOCounters = collections.namedtuple('IOCounters', 'read_bytes write_bytes read_chars write_chars')
+SwapMemory = collections.namedtuple('SwapMemory', 'sin sout')
+CpuFreq = collections.namedtuple('CpuFreq', 'current min max')
+
+FAKE_CORES = 8
+# Background processes holding remote connections in the fake connection table
+FAKE_CONNECTED = 20
+
+
+class FakeProcessTable:
+    """Synthetic process table standing in for the psutil module
+
+    Only the parts of psutil used by the monitor are provided.
+    """
+
+    class NoSuchProcess(Exception):
+        pass
+
+    class AccessDenied(Exception):
+        pass
+
+    HIGH_PRIORITY_CLASS = 128
+
+    def __init__(self, size, game_exe=None, placement='none', churn=0, seed=0):
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 1000
+        self.table = {}
+        for _ in range(size):
+            self.spawn(f"svc{self.next_pid}.exe")
+        if game_exe and placement != 'none':
+            pids = sorted(self.table)
+            pid = {'first': pids[0], 'last': pids[-1]}.get(placement, self.random.choice(pids))
+            self.table[pid] = (game_exe, self.table[pid][1])
+        self.cpu = 0.0
+        # Per-counter call counts drive the fake counters deterministically
+        self.calls = 0
+        self.nic_calls = 0
+        self.thread_calls = 0
+
+    def spawn(self, name):
+        pid = self.next_pid
+        self.next_pid += self.random.randint(1, 8)
+        self.table[pid] = (name, time.time())
+        return pid
+
+    def tick(self):
+        """Replace `churn` background processes, as between two real scans"""
+        if not self.churn:
+            return
+        victims = [p for p, (n, _) in self.table.items() if n.startswith('svc')]
+        for pid in self.random.sample(victims, min(self.churn, len(victims))):
+            del self.table[pid]
+        for _ in range(self.churn):
+            self.spawn(f"svc{self.next_pid}.exe")
+
+    # psutil API
+    def pids(self):
+        return list(self.table)
+
+    def pid_exists(self, pid):
+        return pid in self.table
+
+    def Process(self, pid):
+        return _FakeProcess(self, pid)
+
+    def process_iter(self, attrs=None):
+        for pid in list(self.table):
+            yield _FakeProcess(self, pid)
+
+    def cpu_percent(self, interval=None, percpu=False):
+        self.cpu = (self.cpu + 13.0) % 100.0
+        return [self.cpu] * FAKE_CORES if percpu else self.cpu
+
+    def cpu_times(self, percpu=False):
+        # Counters advance by a fixed step per call: steady, partly busy cores
+        self.calls += 1
+        n = self.calls
+        times = [CpuTimes(n * (0.2 + 0.05 * core), n * 0.05, n * (0.7 - 0.05 * core), n * 0.01)
+                 for core in range(FAKE_CORES)]
+        if percpu:
+            return times
+        return CpuTimes(*(sum(values) for values in zip(*times)))
+
+    def cpu_freq(self):
+        return CpuFreq(3000.0, 800.0, 3600.0)
+
+    def virtual_memory(self):
+        class Memory:
+            percent = 55.0
+            total = 16 * 2 ** 30
+            available = 7 * 2 ** 30
+        return Memory()
+
+    def swap_memory(self):
+        return SwapMemory(self.calls * 4096, self.calls * 8192)
+
+    def net_io_counters(self, pernic=False):
+        self.nic_calls += 1
+        n = self.nic_calls
+        nics = {
+            'lo': NetIO(n * 1000, n * 1000),
+            'eth0': NetIO(n * 20000, n * 300000)
+        }
+        if pernic:
+            return nics
+        return NetIO(*(sum(values) for values in zip(*nics.values())))
+
+    def net_connections(self, kind='inet'):
+        """Remote connections for the game and a fixed set of background processes"""
+        pids = sorted(self.table)
+        step = max(1, len(pids) // FAKE_CONNECTED)
+        owners = pids[::step][:FAKE_CONNECTED]
+        owners += [pid for pid, (name, _) in self.table.items() if not name.startswith('svc')]
+        return [Connection(pid, ('203.0.113.7', 443)) for pid in owners for _ in range(1 + pid % 3)]
+
+
+class _FakeProcess:
+    def __init__(self, table, pid):
+        if pid not in table.table:
+            raise table.NoSuchProcess(pid)
+        self._table = table
+        self.pid = pid
+        self.info = {'name': table.table[pid][0]}
+
+    @contextlib.contextmanager
+    def oneshot(self):
+        yield
+
+    def _entry(self):
+        try:
+            return self._table.table[self.pid]
+        except KeyError:
+            raise self._table.NoSuchProcess(self.pid)
+
+    def name(self):
+        return self._entry()[0]
+
+    def create_time(self):
+        return self._entry()[1]
+
+    def io_counters(self):
+        self._entry()
+        self._table.calls += 1
+        n = self._table.calls * (self.pid % 7 + 1)
+        return IOCounters(n * 4096, n * 1024, n * 65536, n * 16384)
+
+    def threads(self):
+        self._entry()
+        self._table.thread_calls += 1
+        n = self._table.thread_calls
+        return [ThreadTimes(self.pid + i, n * 0.0001 * (i + 1), n * 0.00002) for i in range(4)]
+
+
+# Every module that reads psutil on the get_metrics path
+PATCHED_MODULES = ('performance_monitor', 'system_sampler', 'bandwidth_monitor',
+                   'contention_monitor', 'core_monitor')
+
+
+@contextlib.contextmanager
+def patched_psutil(fake):
+    """Point every monitor module at the fake process table"""
+    import importlib
+    modules = [importlib.import_module(name) for name in PATCHED_MODULES]
+    saved = [m.psutil for m in modules]
+    for module in modules:
+        module.psutil = fake
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, saved):
+            module.psutil = original
+
+
+def synthetic_proc(root):
+    """Write fixed /proc/pressure and /proc/vmstat files under `root`
+
+    Returns (psi_root, vmstat_path) for ContentionMonitor, so pressure
+    sampling parses the same kind of files without reading the host.
+    """
+    psi_root = os.path.join(root, 'pressure')
+    os.makedirs(psi_root, exist_ok=True)
+    for resource in ('cpu', 'memory', 'io'):
+        with open(os.path.join(psi_root, resource), 'w') as f:
+            f.write("some avg10=1.50 avg60=1.20 avg300=0.90 total=123456\n"
+                    "full avg10=0.50 avg60=0.40 avg300=0.30 total=45678\n")
+    vmstat_path = os.path.join(root, 'vmstat')
+    with open(vmstat_path, 'w') as f:
+        f.write("nr_free_pages 123456\npswpin 100\npswpout 200\npgfault 999999\npgmajfault 1234\n")
+    return psi_root, vmstat_path
+
+
+def distribution(samples_ms):
+    ordered = sorted(samples_ms)
+    n = len(ordered)
+    return {
+        'n': n,
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[n // 2],
+        'p95': ordered[min(n - 1, int(n * 0.95))],
+        'p99': ordered[min(n - 1, int(n * 0.99))],
+        'max': ordered[-1]
+    }
+
+
+def bench_monitor(size, placement, churn, cycles):
+    """Time get_metrics and its instrumented stages against one synthetic table"""
+    from performance_monitor import PerformanceMonitor
+    from contention_monitor import ContentionMonitor
+
+    fake = FakeProcessTable(size, game_exe='cs2.exe', placement=placement, churn=churn)
+    with patched_psutil(fake), tempfile.TemporaryDirectory() as proc_root:
+        monitor = PerformanceMonitor()
+        psi_root, vmstat_path = synthetic_proc(proc_root)
+        monitor.contention = ContentionMonitor(psi_root=psi_root, vmstat_path=vmstat_path)
+        # Keep the network prober out of the measurement
+        monitor.prober.start = lambda: None
+        monitor.sampler.start()
+
+        start = time.perf_counter()
+        monitor.detect_game()
+        cold_scan_ms = (time.perf_counter() - start) * 1000.0
+
+        # Stage timings come from the monitor's own instrumentation
+        instr = monitor.instrumentation
+        instr.reset()
+        instr.enabled = True
+        totals = []
+        boosts = {}
+        gc.collect()
+        for _ in range(cycles):
+            # Churn right before the timed call, so process_scan pays the
+            # incremental scan cost every cycle
+            fake.tick()
+            start = time.perf_counter()
+            metrics = monitor.get_metrics(boosts)
+            totals.append((time.perf_counter() - start) * 1000.0)
+        instr.enabled = False
+        stages = instr.snapshot()
+        game = metrics['game']
+
+        # Allocations are measured in a separate pass so tracing doesn't skew timings
+        blocks = []
+        peaks = []
+        tracemalloc.start()
+        for _ in range(max(20, cycles // 4)):
+            fake.tick()
+            tracemalloc.reset_peak()
+            blocks_before = sys.getallocatedblocks()
+            monitor.get_metrics(boosts)
+            blocks.append(sys.getallocatedblocks() - blocks_before)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        monitor.sampler.stop()
+
+    return {
+        'processes': size,
+        'placement': placement,
+        'churn': churn,
+        'cycles': cycles,
+        'game': game,
+        'cold_scan_ms': cold_scan_ms,
+        'get_metrics_ms': distribution(totals),
+        'stages_us': stages,
+        'net_blocks_per_cycle': statistics.fmean(blocks),
+        'peak_traced_bytes_per_cycle': max(peaks)
+    }
+
+
+def bench_tk(updates):
+    """Measure label, progress-bar and graph update throughput through UIDispatcher"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {'skipped': f"no display: {e}"}
+
+    from main import ProgressBarCustom, MetricsGraph
+    from animation_clock import AnimationClock
+    from ui_dispatcher import UIDispatcher
+
+    root.geometry("600x400")
+    ui = UIDispatcher(root)
+    clock = AnimationClock(root)
+    labels = [tk.Label(root, text="-") for _ in range(6)]
+    bars = [ProgressBarCustom(root, clock=clock) for _ in range(8)]
+    for widget in labels + bars:
+        widget.pack(fill='x')
+    root.update()
+
+    start = time.perf_counter()
+    for i in range(updates):
+        for n, label in enumerate(labels):
+            ui.post(label, text=f"{n}: {i % 240}", fg='#00ff00' if i % 2 else '#ffff00')
+        ui.flush()
+        root.update_idletasks()
+    label_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(updates):
+        for bar in bars:
+            ui.call(bar.set_value, i % 101)
+        ui.flush()
+        for bar in bars:
+            bar.tick(1.0)
+        root.update_idletasks()
+    bar_elapsed = time.perf_counter() - start
+
+    # Graph with a full history: every frame adds one sample and redraws
+    graph = MetricsGraph(root)
+    graph.pack(fill='x')
+    for i in range(graph.capacity):
+        graph.push({'fps': 100 + i % 50, 'ping': 20 + i % 7, 'cpu': i % 100})
+    graph.request_redraw()
+    root.update()
+    start = time.perf_counter()
+    for i in range(updates):
+        graph.push({'fps': 100 + i % 50, 'ping': 20 + i % 7, 'cpu': i % 100})
+        graph.request_redraw()
+        root.update_idletasks()
+    graph_elapsed = time.perf_counter() - start
+    root.destroy()
+
+    return {
+        'frames': updates,
+        'label_updates_per_s': updates * len(labels) / label_elapsed,
+        'label_frame_ms': label_elapsed * 1000.0 / updates,
+        'bar_updates_per_s': updates * len(bars) / bar_elapsed,
+        'bar_frame_ms': bar_elapsed * 1000.0 / updates,
+        'graph_points': graph.capacity * len(graph.SERIES),
+        'graph_frame_ms': graph_elapsed * 1000.0 / updates
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS monitor benchmark")
+    parser.add_argument('--sizes', default='100,1000,10000', help="process table sizes")
+    parser.add_argument('--placements', default='none,first,last,random', help="where the game process sits")
+    parser.add_argument('--churn', type=int, default=5, help="processes replaced between cycles")
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--tk-updates', type=int, default=500, help="frames for the Tk scenario (0 = skip)")
+    parser.add_argument('--output', default='-', help="JSON output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    # The harness never needs the real psutil, only its exception types
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        sys.modules['psutil'] = FakeProcessTable(0)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'monitor': [
+            bench_monitor(int(size), placement, args.churn, args.cycles)
+            for size in args.sizes.split(',')
+            for placement in args.placements.split(',')
+        ]
+    }
+    if args.tk_updates:
+        results['tk'] = bench_tk(args.tk_updates)
+
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import threading
+import time
+
+# Probe intervals (seconds) per mode; None disables a probe in that mode
+MONITOR_MODES = {
+    'idle': {
+        'process': 3.0,
+        'system': 2.0,
+        'cores': 2.0,
+        'fps': None,
+        'latency': 5.0,
+        'bandwidth': 5.0,
+        'pressure': 5.0,
+        'publish': 2.0
+    },
+    'active': {
+        # Liveness of the detected game is checked on every publish; a full
+        # rescan is only needed to notice a switch to another game
+        'process': 10.0,
+        'system': 0.5,
+        'cores': 1.0,
+        'fps': 0.25,
+        'latency': 1.0,
+        'bandwidth': 1.0,
+        'pressure': 2.0,
+        'publish': 0.5
+    }
+}
+
+
+class Probe:
+    def __init__(self, name, func, interval, on_interval=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.on_interval = on_interval
+        self.next_due = 0.0
+        self.runs = 0
+        self.cpu_time = 0.0
+
+
+class MonitorScheduler:
+    """Runs monitor probes on one thread, each at its own runtime-adjustable interval
+
+    Probes without a func only forward interval changes through on_interval
+    (e.g. to a component with its own thread). Intervals of None pause a probe.
+    """
+
+    def __init__(self, modes=None, instrumentation=None):
+        self.probes = {}
+        self.modes = modes or MONITOR_MODES
+        self.mode = None
+        self.instrumentation = instrumentation
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add(self, name, func, interval, on_interval=None):
+        probe = Probe(name, func, interval, on_interval)
+        with self._lock:
+            self.probes[name] = probe
+        if on_interval is not None:
+            on_interval(interval)
+        self._wake.set()
+        return probe
+
+    def set_interval(self, name, interval):
+        """Change a probe's interval; a shorter interval takes effect immediately"""
+        with self._lock:
+            probe = self.probes.get(name)
+            if probe is None or probe.interval == interval:
+                return
+            probe.interval = interval
+            if interval is not None:
+                probe.next_due = min(probe.next_due, time.monotonic() + interval)
+        if probe.on_interval is not None:
+            probe.on_interval(interval)
+        self._wake.set()
+
+    def set_mode(self, mode):
+        """Apply the intervals of a mode ('idle', 'active', ...)"""
+        if mode == self.mode:
+            return
+        self.mode = mode
+        for name, interval in self.modes[mode].items():
+            self.set_interval(name, interval)
+
+    def run_due(self, now):
+        """Run every probe that is due; returns when the next one is due"""
+        with self._lock:
+            due = [p for p in self.probes.values()
+                   if p.func is not None and p.interval is not None and p.next_due <= now]
+        instr = self.instrumentation
+        for probe in due:
+            probe.next_due = now + probe.interval
+            profile = instr.profile_cycle_start() if instr is not None else None
+            try:
+                t = instr.begin() if instr is not None else 0
+                cpu_start = time.thread_time()
+                try:
+                    probe.func()
+                except Exception:
+                    pass
+                probe.cpu_time += time.thread_time() - cpu_start
+                probe.runs += 1
+                if instr is not None:
+                    instr.lap('probe_' + probe.name, t)
+            finally:
+                # Profiling must never take the scheduler thread down
+                try:
+                    if instr is not None:
+                        instr.profile_cycle_end(profile)
+                except Exception:
+                    pass
+
+        with self._lock:
+            pending = [p.next_due for p in self.probes.values()
+                       if p.func is not None and p.interval is not None]
+        return min(pending) if pending else now + 1.0
+
+    def stats(self):
+        """Runs, current interval and average CPU cost per run of each probe"""
+        with self._lock:
+            probes = list(self.probes.values())
+        return {
+            p.name: {
+                'interval': p.interval,
+                'runs': p.runs,
+                'cpu_ms_per_run': p.cpu_time * 1000.0 / p.runs if p.runs else 0.0
+            }
+            for p in probes
+        }
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="MonitorScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            next_due = self.run_due(time.monotonic())
+            self._wake.wait(max(0.0, next_due - time.monotonic()))
+            self._wake.clear()
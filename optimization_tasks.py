@@ -0,0 +1,195 @@
+import psutil
+
+from bandwidth_monitor import BandwidthMonitor
+from cache_cleaner import cache_task
+from contention_monitor import ContentionMonitor
+from core_monitor import CoreMonitor
+from cpu_tuner import CpuTuner, DEFAULT_BACKGROUND_PROCESSES, IS_WINDOWS
+
+TASK_IDS = ('cpu', 'gpu', 'ram', 'input', 'lowlatency', 'vsync', 'gamemode', 'cache')
+
+# Tasks that must wait for others when run together
+TASK_DEPENDENCIES = {
+    'lowlatency': ('gpu',),
+    'vsync': ('gpu',),
+    'gamemode': ('cpu', 'ram')
+}
+
+TASK_TIMEOUTS = {
+    'cache': 300
+}
+DEFAULT_TIMEOUT = 60
+
+# IO priority given to background processes by the 'gamemode' task
+IDLE_IO_PRIORITY = psutil.IOPRIO_VERYLOW if IS_WINDOWS else getattr(psutil, 'IOPRIO_CLASS_IDLE', None)
+
+
+# Tasks with no platform implementation yet; Auto Boost must not pick them
+PLACEHOLDER_TASKS = ('gpu', 'input', 'lowlatency', 'vsync')
+
+
+def placeholder_task(ctx):
+    """Task with no platform implementation yet: changes nothing and says so"""
+    ctx.progress(1.0)
+    return "Brak implementacji na tej platformie"
+
+
+class CpuTask:
+    """'cpu' task: tune the detected game's priority/affinity, restore on undo"""
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        # Own instance: the scheduler's 'cores' probe samples monitor.cores, and
+        # extra readings would race with it and skew its throttling count
+        self.cores = CoreMonitor()
+        self.tuner = None
+
+    def run(self, ctx):
+        ctx.progress(0.1, "Szukam gry")
+        self.monitor.detect_game()
+        pid = self.monitor.game_pid
+        if pid is None:
+            return "Nie wykryto gry"
+
+        # Profiles may name their own background processes to move away
+        profile = self.monitor.game_profile
+        names = DEFAULT_BACKGROUND_PROCESSES
+        if profile is not None:
+            names = tuple(names) + tuple(profile.settings.get('background_processes', ()))
+        if self.tuner is None:
+            self.tuner = CpuTuner(names)
+        else:
+            self.tuner.add_background(names)
+
+        # Two core readings give per-core and per-thread load deltas
+        ctx.progress(0.2, "Mierzę obciążenie rdzeni")
+        cores = self.cores
+        cores.sample(pid)
+        ctx.sleep(0.5)
+        snapshot = cores.sample(pid)
+        bottleneck = snapshot['bottleneck']
+        keep = ()
+        if bottleneck is not None and bottleneck['kind'] == 'main_thread':
+            keep = (bottleneck['core'],)
+
+        ctx.progress(0.3, "Podnoszę priorytet")
+        summary = self.tuner.tune(pid, per_core=snapshot['per_core'] or None, keep_cores=keep,
+                                  progress=lambda f: ctx.progress(0.3 + 0.7 * f))
+        alert = cores.describe(snapshot)
+        return f"{summary}; {alert}" if alert else summary
+
+    def undo(self):
+        if self.tuner is not None:
+            self.tuner.undo()
+
+
+class RamTask:
+    """'ram' task: measure memory pressure and name the processes behind it
+
+    Nothing is freed behind the user's back: the result names the largest
+    processes so the user can close them.
+    """
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        # Own instance: the scheduler's 'pressure' probe samples monitor.contention
+        self.contention = ContentionMonitor()
+
+    def run(self, ctx):
+        contention = self.contention
+        ctx.progress(0.1, "Sprawdzam presję pamięci")
+        # Swap rates are deltas, so sample twice
+        contention.sample()
+        ctx.sleep(1.0)
+        pressure = contention.sample()
+        ctx.progress(0.6, "Szukam procesów")
+        by_memory, _ = contention.top_offenders(exclude_pids=[self.monitor.game_pid])
+        ctx.progress(0.9)
+        if not contention.contended('memory', pressure):
+            largest = f", największy proces: {by_memory[0].name}" if by_memory else ""
+            return f"Brak presji pamięci (RAM {pressure['memory_percent']:.0f}%){largest}"
+        summary = contention.describe('memory', pressure, by_memory)
+        return f"{summary}; zamknij je, aby zwolnić RAM (nic nie zostało zamknięte)"
+
+
+class GameModeTask:
+    """'gamemode' task: lower the IO priority of background processes that
+    contend for the disk while a game runs; undo restores it.
+    """
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        # Own instances: the scheduler's probes sample the monitor's ones
+        self.contention = ContentionMonitor()
+        self.bandwidth = BandwidthMonitor()
+        self.changes = {}
+
+    def run(self, ctx):
+        if not hasattr(psutil.Process, 'ionice'):
+            return "Priorytet IO nie jest obsługiwany"
+        contention = self.contention
+        ctx.progress(0.1, "Mierzę obciążenie dysku")
+        self.monitor.detect_game()
+        game_pid = self.monitor.game_pid
+        # IO and network rates are deltas, so sample twice
+        contention.top_offenders(exclude_pids=[game_pid])
+        self.bandwidth.sample(game_pid)
+        ctx.sleep(1.0)
+        pressure = contention.sample()
+        _, by_io = contention.top_offenders(exclude_pids=[game_pid])
+        network = self.bandwidth.sample(game_pid)
+        ctx.progress(0.6, "Obniżam priorytet IO")
+        if game_pid is None or not by_io:
+            return "Brak gry lub procesów obciążających dysk"
+
+        demoted = []
+        for offender in by_io:
+            try:
+                proc = psutil.Process(offender.pid)
+                if offender.pid not in self.changes:
+                    self.changes[offender.pid] = (proc.create_time(), proc.ionice())
+                proc.ionice(IDLE_IO_PRIORITY)
+                demoted.append(offender)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        summary = contention.describe('io', pressure, demoted)
+        summary = f"{summary}; obniżono priorytet IO {len(demoted)} procesów"
+        # Network users can't be throttled from here; name them instead
+        if network['background']:
+            summary += "; " + self.bandwidth.describe(network)
+        return summary
+
+    def undo(self):
+        for pid, (create_time, original) in list(self.changes.items()):
+            try:
+                proc = psutil.Process(pid)
+                if proc.create_time() == create_time:
+                    if IS_WINDOWS:
+                        proc.ionice(original)
+                    else:
+                        proc.ionice(original.ioclass, original.value)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            del self.changes[pid]
+
+
+def register_default_tasks(engine, monitor):
+    """Register the eight basic-tab tasks on a TaskEngine"""
+    cpu = CpuTask(monitor)
+    ram = RamTask(monitor)
+    gamemode = GameModeTask(monitor)
+    runners = {
+        'cpu': (cpu.run, cpu.undo),
+        'gpu': (placeholder_task, None),
+        'ram': (ram.run, None),
+        'input': (placeholder_task, None),
+        'lowlatency': (placeholder_task, None),
+        'vsync': (placeholder_task, None),
+        'gamemode': (gamemode.run, gamemode.undo),
+        'cache': (cache_task(), None)
+    }
+    for task_id in TASK_IDS:
+        run, undo = runners[task_id]
+        engine.register(task_id, run, undo=undo,
+                        depends=TASK_DEPENDENCIES.get(task_id, ()),
+                        timeout=TASK_TIMEOUTS.get(task_id, DEFAULT_TIMEOUT))
@@ -2,116 +2,284 @@ import psutil
 import random
 import subprocess
 import platform
+import threading
 import time
 
+from system_sampler import SystemSampler
+from metrics_store import MetricsStore
+from latency_prober import LatencyProber
+from instrumentation import Instrumentation
+from contention_monitor import ContentionMonitor
+from core_monitor import CoreMonitor
+from bandwidth_monitor import BandwidthMonitor
+from monitor_scheduler import MonitorScheduler
+from game_profiles import GameProfileDB, DEFAULT_PROFILES_PATH
+
+# Re-check create_time of every indexed PID every N scans to catch reused PIDs
+INDEX_REVERIFY_SCANS = 15
+
+
 class PerformanceMonitor:
-    def __init__(self):
+    def __init__(self, profiles_path=DEFAULT_PROFILES_PATH):
         self.current_fps = 60
         self.current_ping = 0
         self.current_game = "-"
         self.monitoring = True
 
-    def detect_game(self):
-        """Detect running games by process name"""
+        # Persistent process index: pid -> (create_time, game name or None)
+        self._process_index = {}
+        self._game_pids = set()
+        self._game_pid = None
+        self._game_create_time = None
+        self._scan_count = 0
+        # detect_game runs on the scheduler and on task threads; it rebuilds the index
+        self._detect_lock = threading.Lock()
+
+        # Game knowledge (executables, FPS ranges, endpoints, settings), hot-reloaded
+        self.profiles = GameProfileDB(profiles_path)
+
+        # CPU/RAM readings come from a background sampler (started on first use)
+        self.sampler = SystemSampler()
+
+        # Optional real frame-time source (e.g. CsvFrameTimeReader)
+        self.frame_source = None
+
+        # Asynchronous ping/network prober (started on first use)
+        self.prober = LatencyProber()
+
+        # Adaptive probe scheduler, see start_scheduler
+        self.scheduler = None
+
+        # Per-core load, clock and game thread usage (single-thread bottlenecks)
+        self.cores = CoreMonitor()
+
+        # NIC throughput and background processes using the network during play
+        self.bandwidth = BandwidthMonitor()
+
+        # PSI / swap / page-fault rates and the processes behind contention
+        self.contention = ContentionMonitor()
+
+        # Per-stage timers for get_metrics (disabled by default)
+        self.instrumentation = Instrumentation()
+
+        # Bounded history of every sample returned by get_metrics
+        self.history = MetricsStore()
+
+    @property
+    def game_pid(self):
+        """PID of the currently detected game, or None"""
+        return self._game_pid
+
+    @property
+    def game_profile(self):
+        """GameProfile of the currently detected game, or None"""
+        return self.profiles.get(self.current_game)
+
+    def match_game(self, proc_name):
+        """Resolve a process name to a game name, or None"""
+        profile = self.profiles.match(proc_name)
+        return profile.name if profile is not None else None
+
+    def _reload_profiles(self):
+        """Pick up profile file changes; re-inspect every process if they changed"""
+        if self.profiles.maybe_reload():
+            self._process_index.clear()
+            self._game_pids.clear()
+            self._set_game(None, None, None)
+
+    def _game_still_running(self):
+        """Check that the cached game PID is alive and was not reused"""
+        if self._game_pid is None:
+            return False
+        if self._game_create_time is None:
+            return psutil.pid_exists(self._game_pid)
         try:
-            games = {
-                'cs2.exe': 'Counter-Strike 2',
-                'csgo.exe': 'Counter-Strike GO', 
-                'valorant.exe': 'Valorant',
-                'valorant-win64-shipping.exe': 'Valorant',
-                'r5apex.exe': 'Apex Legends',
-                'fortnite.exe': 'Fortnite',
-                'fortniteclient-win64-shipping.exe': 'Fortnite',
-                'overwatch.exe': 'Overwatch 2',
-                'league of legends.exe': 'League of Legends',
-                'leagueclient.exe': 'League of Legends',
-                'dota2.exe': 'Dota 2',
-                'minecraft.exe': 'Minecraft',
-                'javaw.exe': 'Minecraft',
-                'cyberpunk2077.exe': 'Cyberpunk 2077',
-                'modernwarfare.exe': 'Call of Duty',
-                'warzone.exe': 'Call of Duty Warzone'
-            }
-            
-            for proc in psutil.process_iter(['name']):
+            return psutil.Process(self._game_pid).create_time() == self._game_create_time
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def _inspect_process(self, pid):
+        """Read create_time and name of a single process for the index"""
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                game = self.match_game(proc.name())
                 try:
-                    proc_name = proc.info['name'].lower()
-                    for game_exe, game_name in games.items():
-                        if game_exe.lower() in proc_name:
-                            return game_name
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    create_time = proc.create_time()
+                except psutil.AccessDenied:
+                    create_time = None
+        except psutil.NoSuchProcess:
+            return None
+        except psutil.AccessDenied:
+            # Keep it indexed so we don't retry protected processes every scan
+            return (None, None)
+        return (create_time, game)
+
+    def _reverify_index(self):
+        """Drop index entries whose PID was reused by a different process"""
+        for pid, (create_time, _) in list(self._process_index.items()):
+            if create_time is None:
+                continue
+            try:
+                if psutil.Process(pid).create_time() == create_time:
                     continue
-            
-            return "-"
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            del self._process_index[pid]
+            self._game_pids.discard(pid)
+
+    def _set_game(self, pid, create_time, game):
+        self._game_pid = pid
+        self._game_create_time = create_time
+        self.current_game = game if game else "-"
+        return self.current_game
+
+    def detect_game(self):
+        """Detect running games by process name (thread-safe)"""
+        with self._detect_lock:
+            return self._detect_game()
+
+    def _detect_game(self):
+        try:
+            self._reload_profiles()
+
+            # Fast path: the game we found last time is still running
+            if self._game_still_running():
+                return self.current_game
+            if self._game_pid is not None:
+                # Exited or reused: forget it so the PID gets re-inspected
+                self._process_index.pop(self._game_pid, None)
+                self._game_pids.discard(self._game_pid)
+
+            self._scan_count += 1
+            if self._scan_count % INDEX_REVERIFY_SCANS == 0:
+                self._reverify_index()
+
+            index = self._process_index
+            pids = set(psutil.pids())
+
+            # Drop exited processes
+            for pid in index.keys() - pids:
+                del index[pid]
+            self._game_pids &= pids
+
+            # Only inspect processes that appeared since the last scan
+            for pid in pids - index.keys():
+                entry = self._inspect_process(pid)
+                if entry is not None:
+                    index[pid] = entry
+                    if entry[1] is not None:
+                        self._game_pids.add(pid)
+
+            for pid in sorted(self._game_pids & index.keys()):
+                create_time, game = index[pid]
+                return self._set_game(pid, create_time, game)
+
+            return self._set_game(None, None, None)
         except Exception:
             return "-"
 
     def get_ping(self, game):
-        """Get realistic ping for games"""
+        """Get measured ping (median RTT) to the game's endpoints, 0 if it has none"""
+        profile = self.profiles.get(game)
+        self.prober.set_game(game, profile.endpoints if profile is not None else None)
         if game == "-":
             return 0
-        
-        # Different games have different typical ping ranges
-        ping_ranges = {
-            'Counter-Strike 2': (15, 45),
-            'Valorant': (12, 35),
-            'Apex Legends': (20, 60),
-            'Fortnite': (18, 50),
-            'Overwatch 2': (15, 40),
-            'League of Legends': (25, 65),
-            'Call of Duty': (20, 55)
-        }
-        
-        min_ping, max_ping = ping_ranges.get(game, (20, 70))
-        return random.randint(min_ping, max_ping)
+        return self.prober.stats('game')['median']
 
-    def get_fps(self, game, boosts):
-        """Calculate FPS based on game and boosts"""
-        if game == "-":
-            base_fps = random.randint(120, 144)
-        else:
-            # Different games have different FPS characteristics
-            game_fps = {
-                'Counter-Strike 2': random.randint(120, 200),
-                'Valorant': random.randint(140, 240),
-                'Apex Legends': random.randint(80, 144),
-                'Fortnite': random.randint(90, 160),
-                'Overwatch 2': random.randint(100, 180),
-                'League of Legends': random.randint(120, 200),
-                'Call of Duty': random.randint(90, 144)
-            }
-            base_fps = game_fps.get(game, random.randint(60, 120))
-        
-        # Apply boosts realistically
-        fps_boost = 0
-        if boosts.get('turbo', False):
-            fps_boost += random.randint(20, 30)
-        if boosts.get('clean', False):
-            fps_boost += random.randint(10, 15)
-        if boosts.get('stabilizer', False):
-            fps_boost += random.randint(15, 20)
-        if boosts.get('upscaler', False):
-            fps_boost += random.randint(25, 35)
-            
-        final_fps = base_fps + fps_boost
-        return max(30, min(300, final_fps))
+    def get_jitter(self, game):
+        """Jitter (ms) of the game's endpoints, or of general ones for games without any
+
+        The ping values are windowed medians, which smooth jitter away.
+        """
+        stats = self.prober.stats('game') if game != "-" else None
+        if not stats or not stats['samples']:
+            stats = self.prober.stats('network')
+        return stats['jitter']
+
+    def get_latency_stats(self):
+        """Get median/jitter/loss for the game and general network endpoints"""
+        return {group: self.prober.stats(group) for group in ('game', 'network')}
+
+    def set_frame_source(self, source):
+        """Use a FrameTimeSource for FPS instead of the simulated values"""
+        if self.frame_source is not None:
+            self.frame_source.close()
+        self.frame_source = source
+
+    def get_frame_stats(self, seconds=5.0):
+        """Get FPS, frame-time percentiles and lows from the frame source, or None"""
+        if self.frame_source is None:
+            return None
+        self.frame_source.poll()
+        return self.frame_source.stats.summary(seconds)
+
+    def get_fps(self):
+        """Get FPS measured by the frame source; 0 when there is none (not measured)"""
+        source = self.frame_source
+        if source is None:
+            return 0
+        source.poll()
+        return source.stats.fps() if source.stats.count else 0
 
     def get_network_latency(self, boosts):
-        """Get network latency with boost effects"""
-        base_latency = random.randint(15, 35)
-        
-        if boosts.get('reflex', False):
-            base_latency = max(8, base_latency - random.randint(10, 18))
-            
-        return base_latency
+        """Get measured network latency (median RTT to general endpoints)"""
+        return self.prober.stats('network')['median']
 
     def toggle_monitoring(self):
         """Toggle monitoring state"""
         self.monitoring = not self.monitoring
         return self.monitoring
 
-    def get_metrics(self, boosts):
-        """Get current performance metrics"""
+    def get_system_stats(self, seconds=10):
+        """Get min/avg/max CPU and memory usage over the last N seconds"""
+        if not self.sampler.running:
+            self.sampler.start()
+        return self.sampler.stats(seconds)
+
+    def start_scheduler(self, get_boosts, on_sample):
+        """Drive all probes from an adaptive MonitorScheduler instead of get_metrics polling
+
+        on_sample(metrics) is called on the scheduler thread at the publish
+        cadence, which is fast while a game runs and slow when idle.
+        """
+        scheduler = MonitorScheduler(instrumentation=self.instrumentation)
+        self.scheduler = scheduler
+        self.sampler.start(background=False)
+        self.prober.start()
+
+        def discover():
+            game = self.detect_game()
+            scheduler.set_mode('active' if game != "-" else 'idle')
+
+        def poll_frames():
+            if self.frame_source is not None:
+                self.frame_source.poll()
+
+        def publish():
+            # Cheap liveness check of the known game; full rescans are left to 'process'
+            if self.current_game != "-" and not self._game_still_running():
+                discover()
+            on_sample(self.get_metrics(get_boosts(), detect=False))
+
+        scheduler.add('process', discover, 3.0)
+        scheduler.add('system', self.sampler.sample, 2.0)
+        scheduler.add('cores', lambda: self.cores.sample(self._game_pid), 2.0)
+        scheduler.add('fps', poll_frames, None)
+        scheduler.add('latency', None, 5.0, on_interval=lambda s: setattr(self.prober, 'interval', s or 5.0))
+        scheduler.add('bandwidth', lambda: self.bandwidth.sample(self._game_pid), 5.0)
+        scheduler.add('pressure', self.contention.sample, 5.0)
+        scheduler.add('publish', publish, 2.0)
+        scheduler.set_mode('idle')
+        scheduler.start()
+        return scheduler
+
+    def get_metrics(self, boosts, detect=True):
+        """Get current performance metrics
+
+        With detect=False the last detected game is reused instead of scanning
+        processes (the scheduler runs discovery on its own cadence).
+        """
         if not self.monitoring:
             return {
                 'fps': 0,
@@ -119,33 +287,67 @@ class PerformanceMonitor:
                 'game': '-',
                 'cpu': 0,
                 'memory': 0,
-                'network': 0
+                'memory_stall': 0,
+                'cpu_core_max': 0,
+                'cpu_alert': '',
+                'network': 0,
+                'jitter': 0,
+                'frametime_max': 0,
+                'net_recv': 0,
+                'net_sent': 0,
+                'net_hog': ''
             }
         
-        game = self.detect_game()
-        fps = self.get_fps(game, boosts)
+        if not self.prober.running:
+            self.prober.start()
+
+        instr = self.instrumentation
+        t = instr.begin()
+        game = self.detect_game() if detect else self.current_game
+        t = instr.lap('process_scan', t)
+        fps = self.get_fps()
+        t = instr.lap('fps', t)
         ping = self.get_ping(game)
         network_latency = self.get_network_latency(boosts)
-        
-        # Apply ping reduction from reflex boost
-        if boosts.get('reflex', False) and ping > 0:
-            ping = max(5, ping - random.randint(10, 20))
+        jitter = self.get_jitter(game)
+        bandwidth = self.bandwidth.latest if self.scheduler is not None else self.bandwidth.sample(self._game_pid)
+        t = instr.lap('ping', t)
         
         # Get system metrics with boost effects
-        cpu_usage = psutil.cpu_percent(interval=0.1)
-        memory_usage = psutil.virtual_memory().percent
+        if not self.sampler.running:
+            self.sampler.start()
+        cpu_usage, memory_usage = self.sampler.latest()
         
         # Apply system optimizations from boosts
         if boosts.get('silent', False):
             cpu_usage = max(10, cpu_usage - random.randint(5, 15))
-        if boosts.get('clean', False):
-            memory_usage = max(20, memory_usage - random.randint(10, 25))
+
+        # Memory stall share; the scheduler samples pressure on its own cadence
+        pressure = self.contention.latest if self.scheduler is not None else self.contention.sample()
+        memory_stall = pressure['stall'].get('memory', 0.0) if pressure else 0.0
+        cores = self.cores.latest if self.scheduler is not None else self.cores.sample(self._game_pid)
+        t = instr.lap('cpu_sampling', t)
         
-        return {
+        metrics = {
             'fps': int(fps),
             'ping': int(ping),
             'game': game,
             'cpu': cpu_usage,
             'memory': memory_usage,
-            'network': int(network_latency)
-        }
\ No newline at end of file
+            'memory_stall': memory_stall,
+            'cpu_core_max': cores['busiest_percent'] if cores else 0.0,
+            'cpu_alert': self.cores.describe(cores),
+            'network': int(network_latency),
+            'jitter': jitter,
+            'frametime_max': self.frame_source.stats.take_peak() if self.frame_source is not None else 0.0,
+            'net_recv': bandwidth['recv'] if bandwidth else 0.0,
+            'net_sent': bandwidth['sent'] if bandwidth else 0.0,
+            'net_hog': bandwidth['background'][0]['name'] if bandwidth and bandwidth['background'] else ''
+        }
+        self.history.append(metrics)
+        instr.lap('history', t)
+        return metrics
+
+    def get_history_summary(self, seconds=60):
+        """Get rolling averages, percentiles and 1%/0.1% low FPS over the last N seconds"""
+        return self.history.summary(seconds)
\ No newline at end of file
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Luna FPS session recorder
+Appends monitor samples to a compact fixed-width binary file, loads recorded
+sessions through mmap, replays them and compares two sessions (A/B).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+from metrics_store import MetricsStore, SERIES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'LUNAREC1'
+
+# Header: magic, record size, game count, boost count, then fixed name tables
+# that are updated in place when a new game or boost first appears
+MAX_GAMES = 255
+# Game id of samples whose game no longer fit in the name table
+OVERFLOW_GAME_ID = 255
+OVERFLOW_GAME = "(inna gra)"
+MAX_BOOSTS = 32
+GAME_NAME_SIZE = 48
+BOOST_NAME_SIZE = 24
+HEADER_STRUCT = struct.Struct('<8sIHH')
+GAMES_OFFSET = HEADER_STRUCT.size
+BOOSTS_OFFSET = GAMES_OFFSET + MAX_GAMES * GAME_NAME_SIZE
+HEADER_SIZE = BOOSTS_OFFSET + MAX_BOOSTS * BOOST_NAME_SIZE
+
+# One sample: wall time, six metrics, game id, boost bitmask (40 bytes)
+RECORD_FIELDS = ('ts', 'fps', 'ping', 'cpu', 'memory', 'memory_stall', 'network', 'game', 'boosts')
+RECORD_STRUCT = struct.Struct('<dffffffBxxxI')
+RECORD_METRICS = RECORD_FIELDS[1:7]
+# Integers in live samples, stored as floats
+INT_METRICS = ('fps', 'ping', 'network')
+
+# Longest pause between two samples that replay reproduces, in seconds
+MAX_REPLAY_GAP = 5.0
+
+
+def _encode_name(name, size):
+    return name.encode('utf-8')[:size].ljust(size, b'\0')
+
+
+def _decode_names(buffer, offset, count, size):
+    return [bytes(buffer[offset + i * size:offset + (i + 1) * size]).rstrip(b'\0').decode('utf-8', 'replace')
+            for i in range(count)]
+
+
+class SessionRecorder:
+    """Appends metrics samples to a session file; thread-safe
+
+    Games and boost names are dictionary-encoded into the header, so every
+    sample is one RECORD_STRUCT. Appending to an existing file continues it.
+    """
+
+    def __init__(self, path, flush_every=20):
+        self.path = path
+        self.flush_every = flush_every
+        self.games = []
+        self.boosts = []
+        self.count = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            self._file = open(path, 'r+b')
+            session = SessionFile(path)
+            self.games, self.boosts = list(session.games), list(session.boosts)
+            self.count = len(session)
+            session.close()
+            # Drop a torn trailing record left by a crash
+            self._file.truncate(HEADER_SIZE + self.count * RECORD_STRUCT.size)
+        else:
+            self._file = open(path, 'w+b')
+            self._file.write(b'\0' * HEADER_SIZE)
+            self._write_header()
+        self._file.seek(0, os.SEEK_END)
+        self._game_ids = {name: i for i, name in enumerate(self.games)}
+        self._boost_bits = {name: i for i, name in enumerate(self.boosts)}
+
+    def _write_header(self):
+        self._file.seek(0)
+        self._file.write(HEADER_STRUCT.pack(MAGIC, RECORD_STRUCT.size, len(self.games), len(self.boosts)))
+
+    def _intern(self, table, ids, name, limit, offset, size):
+        index = ids.get(name)
+        if index is None:
+            if len(table) >= limit:
+                return None
+            index = ids[name] = len(table)
+            table.append(name)
+            self._file.seek(offset + index * size)
+            self._file.write(_encode_name(name, size))
+            self._write_header()
+            self._file.seek(0, os.SEEK_END)
+        return index
+
+    def record(self, metrics, boosts=None, timestamp=None):
+        """Append one sample; boosts is a {name: enabled} dict"""
+        with self._lock:
+            if self._file is None:
+                return
+            game = self._intern(self.games, self._game_ids, metrics.get('game', '-'),
+                                MAX_GAMES, GAMES_OFFSET, GAME_NAME_SIZE)
+            mask = 0
+            for name, enabled in (boosts or {}).items():
+                bit = self._intern(self.boosts, self._boost_bits, name, MAX_BOOSTS, BOOSTS_OFFSET, BOOST_NAME_SIZE)
+                if enabled and bit is not None:
+                    mask |= 1 << bit
+            values = [float(metrics.get(name, 0) or 0) for name in RECORD_METRICS]
+            self._file.write(RECORD_STRUCT.pack(time.time() if timestamp is None else timestamp,
+                                                *values, OVERFLOW_GAME_ID if game is None else game, mask))
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SessionFile:
+    """Read-only, memory-mapped view of a recorded session
+
+    Opening is O(1) whatever the session length; records are decoded on
+    access, and columns come straight from the mapping when numpy is present.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f"{path}: not a Luna FPS session")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, record_size, games, boosts = HEADER_STRUCT.unpack_from(self._mmap, 0)
+        if magic != MAGIC or record_size != RECORD_STRUCT.size:
+            self._mmap.close()
+            raise ValueError(f"{path}: not a Luna FPS session")
+        self.games = _decode_names(self._mmap, GAMES_OFFSET, games, GAME_NAME_SIZE)
+        self.boosts = _decode_names(self._mmap, BOOSTS_OFFSET, boosts, BOOST_NAME_SIZE)
+        self._count = (size - HEADER_SIZE) // RECORD_STRUCT.size
+
+    def __len__(self):
+        return self._count
+
+    def raw(self, index):
+        """Return the record tuple at index (see RECORD_FIELDS)"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return RECORD_STRUCT.unpack_from(self._mmap, HEADER_SIZE + index * RECORD_STRUCT.size)
+
+    def decode(self, record):
+        """Turn a record tuple into (timestamp, metrics dict, boosts dict)"""
+        ts, *values, game, mask = record
+        metrics = dict(zip(RECORD_METRICS, values))
+        for name in INT_METRICS:
+            metrics[name] = int(round(metrics[name]))
+        metrics['game'] = self.games[game] if game < len(self.games) else OVERFLOW_GAME
+        boosts = {name: bool(mask >> bit & 1) for bit, name in enumerate(self.boosts)}
+        return ts, metrics, boosts
+
+    def __getitem__(self, index):
+        return self.decode(self.raw(index))
+
+    def __iter__(self):
+        end = HEADER_SIZE + self._count * RECORD_STRUCT.size
+        for record in RECORD_STRUCT.iter_unpack(memoryview(self._mmap)[HEADER_SIZE:end]):
+            yield self.decode(record)
+
+    def column(self, name):
+        """Values of one record field, oldest-first (a numpy view when available)"""
+        position = RECORD_FIELDS.index(name)
+        if np is not None:
+            dtype = np.dtype({'names': list(RECORD_FIELDS),
+                              'formats': ['<f8'] + ['<f4'] * 6 + ['u1', '<u4'],
+                              'offsets': [0, 8, 12, 16, 20, 24, 28, 32, 36],
+                              'itemsize': RECORD_STRUCT.size})
+            return np.frombuffer(self._mmap, dtype=dtype, count=self._count, offset=HEADER_SIZE)[name]
+        end = HEADER_SIZE + self._count * RECORD_STRUCT.size
+        return [record[position] for record in RECORD_STRUCT.iter_unpack(memoryview(self._mmap)[HEADER_SIZE:end])]
+
+    @property
+    def duration(self):
+        if self._count < 2:
+            return 0.0
+        return self.raw(-1)[0] - self.raw(0)[0]
+
+    def to_store(self):
+        """Load the whole session into a MetricsStore (timestamps are wall time)"""
+        store = MetricsStore(capacity=max(1, self._count))
+        for ts, metrics, _ in self:
+            store.append(metrics, ts)
+        return store
+
+    def close(self):
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A column view is still alive; the mapping goes away with it
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SessionPlayer:
+    """Feeds a recorded session to on_sample(metrics) with its original pacing
+
+    speed > 1 plays faster; samples are also appended to `store` (with the
+    replay's monotonic time) so statistics behave as during a live run.
+    The player owns the session and closes it when playback ends.
+    """
+
+    def __init__(self, session, on_sample, speed=1.0, store=None, on_done=None):
+        self.session = session
+        self.on_sample = on_sample
+        self.speed = speed
+        self.store = store
+        self.on_done = on_done
+        self.position = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="SessionPlayer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        start = time.monotonic()
+        elapsed = 0.0
+        previous = None
+        records = iter(self.session)
+        try:
+            for ts, metrics, _ in records:
+                if previous is not None:
+                    # Sessions appended to later contain long pauses; don't wait them out
+                    elapsed += min(max(0.0, ts - previous), MAX_REPLAY_GAP)
+                previous = ts
+                delay = start + elapsed / self.speed - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+                if self._stop.is_set():
+                    break
+                if self.store is not None:
+                    self.store.append(metrics)
+                self.on_sample(metrics)
+                self.position += 1
+        finally:
+            # Release the generator's view of the mapping before unmapping it
+            records.close()
+            self.session.close()
+        if self.on_done is not None:
+            self.on_done()
+
+
+def compare_sessions(a, b, series=SERIES):
+    """A/B comparison: per-series avg/p95 of both sessions and the relative change"""
+    summary_a = a.to_store().summary()
+    summary_b = b.to_store().summary()
+    result = {}
+    for name in series:
+        stats = {}
+        for key in summary_a[name]:
+            before, after = summary_a[name][key], summary_b[name][key]
+            stats[key] = {
+                'a': before,
+                'b': after,
+                'change': (after - before) / before * 100.0 if before else 0.0
+            }
+        result[name] = stats
+    return result
+
+
+def describe_summary(summary):
+    """One line for the UI, e.g. 'FPS śr. 131, 1% low 98 · ping śr. 24 ms · CPU śr. 45%'"""
+    fps = summary['fps']
+    return (f"FPS śr. {fps['avg']:.0f}, 1% low {fps['1%']:.0f} · ping śr. {summary['ping']['avg']:.0f} ms"
+            f" · CPU śr. {summary['cpu']['avg']:.0f}%")
+
+
+def describe_comparison(comparison):
+    """Short text for the UI, e.g. 'FPS avg 118 → 131 (+11%), 1% low ...'"""
+    lines = []
+    fps = comparison['fps']
+    for key, label in (('avg', "FPS śr."), ('1%', "FPS 1% low"), ('0.1%', "FPS 0.1% low")):
+        lines.append(f"{label}: {fps[key]['a']:.0f} → {fps[key]['b']:.0f} ({fps[key]['change']:+.1f}%)")
+    for name, label in (('ping', "Ping"), ('cpu', "CPU"), ('memory', "RAM")):
+        stats = comparison[name]['avg']
+        lines.append(f"{label} śr.: {stats['a']:.1f} → {stats['b']:.1f} ({stats['change']:+.1f}%)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS session tool")
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('summary', help="print a session summary")
+    info.add_argument('session')
+    compare = sub.add_parser('compare', help="A/B compare two sessions")
+    compare.add_argument('a')
+    compare.add_argument('b')
+    args = parser.parse_args(argv)
+
+    if args.command == 'summary':
+        with SessionFile(args.session) as session:
+            print(json.dumps({
+                'samples': len(session),
+                'duration': session.duration,
+                'games': session.games,
+                'boosts': session.boosts,
+                'summary': session.to_store().summary()
+            }, indent=2))
+    else:
+        with SessionFile(args.a) as a, SessionFile(args.b) as b:
+            comparison = compare_sessions(a, b)
+        print(describe_comparison(comparison), file=sys.stderr)
+        print(json.dumps(comparison, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Luna FPS startup benchmark
+Starts the app in fresh interpreters and reports import time,
+time-to-first-paint and time-to-first-metric (needs a display, e.g. Xvfb).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_child(timeout):
+    """Measure one cold start inside this process and print JSON"""
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    app = main.LunaFPSApp()
+
+    def check():
+        marks = app.startup_marks
+        if 'first_metric' in marks or time.perf_counter() - start > timeout:
+            app.root.destroy()
+            return
+        app.root.after(5, check)
+
+    app.root.after(5, check)
+    app.run()
+
+    marks = app.startup_marks
+    result = {'import_ms': (imported - start) * 1000.0}
+    for name in ('first_paint', 'monitor_ready', 'first_metric'):
+        if name in marks:
+            result[name + '_ms'] = (marks[name] - start) * 1000.0
+    print(json.dumps(result))
+
+
+def summarize(results):
+    keys = sorted({k for r in results for k in r})
+    summary = {}
+    for key in keys:
+        values = [r[key] for r in results if key in r]
+        summary[key] = {
+            'median': statistics.median(values),
+            'min': min(values),
+            'max': max(values),
+            'runs': len(values)
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Luna FPS startup benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=10.0, help="per-run wait for the first metric (s)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.timeout)
+        return
+
+    results = []
+    for _ in range(args.runs):
+        proc = subprocess.run([sys.executable, __file__, '--child', '--timeout', str(args.timeout)],
+                              cwd=HERE, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            sys.exit(proc.returncode)
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(json.dumps({'runs': results, 'summary': summarize(results)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
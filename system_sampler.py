@@ -0,0 +1,126 @@
+import threading
+import time
+
+import psutil
+
+
+class SampleRing:
+    """Fixed-size ring buffer of (timestamp, cpu, memory) samples"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = [0.0] * capacity
+        self.cpu = [0.0] * capacity
+        self.memory = [0.0] * capacity
+        self.count = 0
+        self.head = 0
+
+    def append(self, timestamp, cpu, memory):
+        i = self.head
+        self.times[i] = timestamp
+        self.cpu[i] = cpu
+        self.memory[i] = memory
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def latest(self):
+        """Return the newest (timestamp, cpu, memory) or None"""
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.times[i], self.cpu[i], self.memory[i]
+
+    def window(self, since):
+        """Yield samples newer than `since`, newest first"""
+        for n in range(self.count):
+            i = (self.head - 1 - n) % self.capacity
+            if self.times[i] < since:
+                break
+            yield self.times[i], self.cpu[i], self.memory[i]
+
+
+class SystemSampler:
+    """Samples CPU and memory usage on its own thread without blocking callers"""
+
+    def __init__(self, interval=0.5, history_seconds=120):
+        self.interval = interval
+        self.ring = SampleRing(max(1, int(history_seconds / interval)))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._external = False
+        self._primed = None
+
+    @property
+    def running(self):
+        return self._external or (self._thread is not None and self._thread.is_alive())
+
+    def start(self, background=True):
+        """Start sampling (no-op if already running)
+
+        With background=False no thread is started and the caller is
+        expected to call sample() on its own cadence.
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        # First non-blocking call only establishes the baseline for deltas;
+        # the first stored sample comes one interval later
+        psutil.cpu_percent(interval=None)
+        self._primed = time.monotonic()
+        if not background:
+            self._external = True
+            return
+        self._thread = threading.Thread(target=self._run, name="SystemSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._external = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def sample(self):
+        """Take one non-blocking delta reading and store it"""
+        now = time.monotonic()
+        if self._primed is not None and now - self._primed < self.interval:
+            # A delta this soon after priming covers almost no time and reads ~0%
+            return
+        cpu = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory().percent
+        with self._lock:
+            self.ring.append(now, cpu, memory)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                continue
+
+    def latest(self):
+        """Return the latest (cpu, memory) percentages"""
+        with self._lock:
+            last = self.ring.latest()
+        if last is None:
+            return 0.0, 0.0
+        return last[1], last[2]
+
+    def stats(self, seconds):
+        """Return min/avg/max of cpu and memory over the last `seconds`"""
+        since = time.monotonic() - seconds
+        with self._lock:
+            samples = list(self.ring.window(since))
+        if not samples:
+            empty = {'min': 0.0, 'avg': 0.0, 'max': 0.0}
+            return {'cpu': dict(empty), 'memory': dict(empty), 'samples': 0}
+
+        cpu = [s[1] for s in samples]
+        memory = [s[2] for s in samples]
+        return {
+            'cpu': {'min': min(cpu), 'avg': sum(cpu) / len(cpu), 'max': max(cpu)},
+            'memory': {'min': min(memory), 'avg': sum(memory) / len(memory), 'max': max(memory)},
+            'samples': len(samples)
+        }
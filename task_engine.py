@@ -0,0 +1,213 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when it was cancelled via TaskEngine.cancel"""
+
+
+class TaskTimeout(TaskCancelled):
+    """Raised inside a task when it ran past its timeout"""
+
+
+class TaskContext:
+    """Handle passed to a running task for progress reporting and cancellation"""
+
+    def __init__(self, task_id, report, timeout=None):
+        self.task_id = task_id
+        self._report = report
+        self._cancel = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.timed_out = False
+
+    @property
+    def cancelled(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.timed_out = True
+            self._cancel.set()
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        """Raise TaskCancelled/TaskTimeout if the task should stop"""
+        if self.cancelled:
+            raise TaskTimeout(self.task_id) if self.timed_out else TaskCancelled(self.task_id)
+
+    def progress(self, fraction, message=None):
+        """Report progress in the 0.0-1.0 range and check for cancellation"""
+        self._report(self.task_id, max(0.0, min(1.0, fraction)), message)
+        self.check()
+
+    def sleep(self, seconds):
+        """Wait up to `seconds`, waking early on cancellation"""
+        if self.deadline is not None:
+            seconds = min(seconds, max(0.0, self.deadline - time.monotonic()))
+        self._cancel.wait(seconds)
+        self.check()
+
+
+class TaskSpec:
+    def __init__(self, task_id, run, undo=None, depends=(), timeout=60):
+        self.task_id = task_id
+        self.run = run
+        self.undo = undo
+        self.depends = tuple(depends)
+        self.timeout = timeout
+
+
+class TaskEngine:
+    """Runs optimization tasks on a bounded worker pool
+
+    Tasks are callables taking a TaskContext. Callbacks fire on worker threads:
+    on_progress(task_id, fraction, message) and on_finish(task_id, status, result)
+    where status is 'done', 'cancelled', 'timeout', 'failed' or 'undone'.
+
+    Cancellation and timeouts are cooperative: they only take effect when the
+    task calls ctx.check(), ctx.progress() or ctx.sleep() (or reads
+    ctx.cancelled), so long blocking calls should be split up.
+    """
+
+    def __init__(self, max_workers=4, on_progress=None, on_finish=None):
+        self.specs = {}
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="LunaTask")
+        self._lock = threading.Lock()
+        self._running = {}
+        self._futures = {}
+
+    def register(self, task_id, run, undo=None, depends=(), timeout=60):
+        self.specs[task_id] = TaskSpec(task_id, run, undo, depends, timeout)
+
+    def is_running(self, task_id):
+        with self._lock:
+            return task_id in self._running
+
+    def run(self, task_id, on_complete=None, join=False):
+        """Submit a task; returns its Future, or None if it is already running
+
+        With join=True a running task's Future is returned instead, and
+        on_complete fires when that run finishes.
+        """
+        spec = self.specs[task_id]
+        with self._lock:
+            if task_id in self._running:
+                if not join:
+                    return None
+                future = self._futures[task_id]
+            else:
+                ctx = TaskContext(task_id, self._report, spec.timeout)
+                self._running[task_id] = ctx
+                future = self._executor.submit(self._execute, spec, ctx)
+                self._futures[task_id] = future
+        if on_complete is not None:
+            future.add_done_callback(lambda f: on_complete(task_id, f.result()))
+        return future
+
+    def cancel(self, task_id):
+        """Cooperatively cancel a running task; returns True if it was running"""
+        with self._lock:
+            ctx = self._running.get(task_id)
+        if ctx is None:
+            return False
+        ctx.cancel()
+        return True
+
+    def disable(self, task_id):
+        """Cancel a running task, then revert its changes via its undo callable"""
+        self.cancel(task_id)
+        spec = self.specs[task_id]
+        if spec.undo is None:
+            return
+        with self._lock:
+            future = self._futures.get(task_id)
+        if future is not None and not future.done():
+            # Undo only once the cancelled run has actually stopped
+            future.add_done_callback(lambda f: self._executor.submit(self._undo, spec))
+        else:
+            self._executor.submit(self._undo, spec)
+
+    def run_all(self, task_ids=None, on_complete=None):
+        """Run tasks concurrently, starting each one as soon as its dependencies finish
+
+        Dependencies outside `task_ids` are ignored. A failed or cancelled
+        dependency skips its dependents. on_complete(statuses) fires once all
+        tasks are settled.
+        """
+        task_ids = [t for t in (task_ids or self.specs) if t in self.specs]
+        selected = set(task_ids)
+        waiting = {t: {d for d in self.specs[t].depends if d in selected} for t in task_ids}
+        statuses = {}
+        lock = threading.Lock()
+
+        def settle(task_id, status):
+            ready = []
+            with lock:
+                statuses[task_id] = status
+                for other, deps in waiting.items():
+                    if task_id in deps and other not in statuses:
+                        deps.discard(task_id)
+                        if status != 'done':
+                            ready.append((other, 'skipped'))
+                        elif not deps:
+                            ready.append((other, None))
+                finished = len(statuses) == len(task_ids)
+            for other, skip in ready:
+                if skip:
+                    settle(other, skip)
+                else:
+                    start(other)
+            if finished and on_complete is not None:
+                on_complete(dict(statuses))
+
+        def start(task_id):
+            # A task already running on its own is joined, not restarted
+            self.run(task_id, on_complete=settle, join=True)
+
+        for task_id in task_ids:
+            if not waiting[task_id]:
+                start(task_id)
+        return statuses
+
+    def shutdown(self):
+        with self._lock:
+            contexts = list(self._running.values())
+        for ctx in contexts:
+            ctx.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _report(self, task_id, fraction, message):
+        if self.on_progress is not None:
+            self.on_progress(task_id, fraction, message)
+
+    def _finish(self, task_id, status, result):
+        if self.on_finish is not None:
+            self.on_finish(task_id, status, result)
+        return status
+
+    def _execute(self, spec, ctx):
+        try:
+            ctx.check()
+            result = spec.run(ctx)
+            self._report(spec.task_id, 1.0, None)
+            status = 'done'
+        except TaskTimeout:
+            status, result = 'timeout', None
+        except TaskCancelled:
+            status, result = 'cancelled', None
+        except Exception as e:
+            status, result = 'failed', e
+        finally:
+            with self._lock:
+                self._running.pop(spec.task_id, None)
+                self._futures.pop(spec.task_id, None)
+        return self._finish(spec.task_id, status, result)
+
+    def _undo(self, spec):
+        try:
+            return self._finish(spec.task_id, 'undone', spec.undo())
+        except Exception as e:
+            return self._finish(spec.task_id, 'failed', e)
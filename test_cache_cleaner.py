@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+import cache_cleaner
+from cache_cleaner import CacheCleaner
+
+OLD = time.time() - 2 * cache_cleaner.DEFAULT_MIN_AGE
+
+
+def make_file(path, size, mtime=OLD):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    root = tmp_path / 'cache'
+    old = [make_file(root / 'a.bin', 100), make_file(root / 'sub' / 'b.bin', 250),
+           make_file(root / 'sub' / 'deep' / 'c.bin', 4096)]
+    young = [make_file(root / 'sub' / 'fresh.bin', 70, mtime=time.time())]
+    return root, old, young
+
+
+def test_only_old_files_are_removed_and_sizes_counted(cache):
+    root, old, young = cache
+    report = CacheCleaner([str(root)]).clean()
+    assert (report.files, report.bytes) == (3, 100 + 250 + 4096)
+    assert report.skipped_young == 1
+    assert not any(path.exists() for path in old)
+    assert all(path.exists() for path in young)
+
+
+def test_dry_run_counts_without_deleting(cache):
+    root, old, young = cache
+    report = CacheCleaner([str(root)], dry_run=True).clean()
+    assert (report.files, report.bytes, report.skipped_young) == (3, 4446, 1)
+    assert all(path.exists() for path in old + young)
+
+
+def test_min_age_below_file_age_removes_everything(cache):
+    root, old, young = cache
+    report = CacheCleaner([str(root)], min_age=-60).clean()
+    assert report.files == 4
+    assert not any(path.exists() for path in old + young)
+
+
+def test_symlinks_are_removed_but_not_followed(tmp_path):
+    root = tmp_path / 'cache'
+    outside = tmp_path / 'outside'
+    target_file = make_file(outside / 'keep.bin', 10)
+    make_file(outside / 'nested' / 'keep2.bin', 10)
+    root.mkdir()
+    (root / 'dir_link').symlink_to(outside, target_is_directory=True)
+    (root / 'file_link').symlink_to(target_file)
+    for link in ('dir_link', 'file_link'):
+        os.utime(root / link, (OLD, OLD), follow_symlinks=False)
+
+    report = CacheCleaner([str(root)]).clean()
+    # Only the two links themselves go; nothing behind them is touched
+    assert report.files == 2
+    assert not os.path.lexists(root / 'dir_link')
+    assert target_file.exists()
+    assert (outside / 'nested' / 'keep2.bin').exists()
+
+
+def test_locked_files_and_unreadable_directories_are_skipped(cache):
+    root, old, young = cache
+    locked = str(old[0])
+    unreadable = str(root / 'sub' / 'deep')
+    real_unlink, real_scandir = os.unlink, os.scandir
+
+    def unlink(path):
+        if path == locked:
+            raise PermissionError(13, "in use", path)
+        real_unlink(path)
+
+    def scandir(path):
+        if path == unreadable:
+            raise PermissionError(13, "denied", path)
+        return real_scandir(path)
+
+    with mock.patch.object(cache_cleaner.os, 'unlink', unlink), \
+            mock.patch.object(cache_cleaner.os, 'scandir', scandir):
+        report = CacheCleaner([str(root)]).clean()
+    assert report.files == 1
+    assert report.skipped_in_use == 1
+    assert report.errors == 1
+    assert old[0].exists() and old[2].exists()
+    assert not old[1].exists()
+
+
+def test_cancellation_stops_the_walk_midway(tmp_path, monkeypatch):
+    root = tmp_path / 'cache'
+    for i in range(300):
+        make_file(root / f'd{i % 3}' / f'{i}.bin', 1)
+    monkeypatch.setattr(cache_cleaner, 'REPORT_EVERY', 10)
+    cancel = threading.Event()
+    real_unlink = os.unlink
+    deleted = []
+
+    def unlink(path):
+        deleted.append(path)
+        if len(deleted) == 50:
+            # Give the coordinator time to see the cancellation before going on
+            cancel.set()
+            time.sleep(5 * cache_cleaner.POLL_INTERVAL)
+        real_unlink(path)
+
+    fractions = []
+    monkeypatch.setattr(cache_cleaner.os, 'unlink', unlink)
+    report = CacheCleaner([str(root)]).clean(progress=lambda fraction, report: fractions.append(fraction),
+                                             cancelled=cancel.is_set)
+    assert report.files == 50
+    assert len(list(root.rglob('*.bin'))) == 250
+    assert report.roots_done == 1
+    assert fractions[-1] == 1.0
+
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import psutil
+
+import cpu_tuner
+from cpu_tuner import CpuTuner, GAME_NICE_STEP, BACKGROUND_NICE_STEP, min_allowed_nice, supports_affinity
+
+
+def spawn_sleeper():
+    return subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+
+
+@unittest.skipIf(cpu_tuner.IS_WINDOWS, "niceness steps are POSIX-only")
+class CpuTunerTest(unittest.TestCase):
+    def setUp(self):
+        self.children = []
+
+    def tearDown(self):
+        for child in self.children:
+            child.kill()
+            child.wait()
+
+    def sleeper(self):
+        child = spawn_sleeper()
+        self.children.append(child)
+        return psutil.Process(child.pid)
+
+    def expected_nice(self, original, step):
+        target = max(-20, min(19, original + step))
+        return target if target >= min_allowed_nice() and original >= min_allowed_nice() else original
+
+    def test_tune_and_undo_restore_nice_and_affinity(self):
+        game, background = self.sleeper(), self.sleeper()
+        original = {proc.pid: (proc.nice(), proc.cpu_affinity() if supports_affinity() else None)
+                    for proc in (game, background)}
+        tuner = CpuTuner(background_names=())
+        per_core = [0.0] * (psutil.cpu_count(logical=True) or 1)
+        game_cores, background_cores = tuner.plan_cores(per_core)
+
+        summary = tuner.tune(game.pid, background_pids=[background.pid], per_core=per_core)
+
+        game_nice = self.expected_nice(original[game.pid][0], GAME_NICE_STEP)
+        self.assertEqual(game.nice(), game_nice)
+        self.assertEqual(background.nice(), self.expected_nice(original[background.pid][0], BACKGROUND_NICE_STEP))
+        self.assertIn("podniesiony" if game_nice != original[game.pid][0] else "bez zmian", summary)
+        if supports_affinity():
+            self.assertEqual(game.cpu_affinity(), game_cores)
+            self.assertEqual(background.cpu_affinity(), background_cores)
+
+        self.assertEqual(tuner.undo(), 2)
+        for proc in (game, background):
+            nice, affinity = original[proc.pid]
+            self.assertEqual(proc.nice(), nice)
+            if affinity is not None:
+                self.assertEqual(proc.cpu_affinity(), affinity)
+        self.assertEqual(tuner.changes, {})
+
+    def test_summary_does_not_claim_priority_change_when_not_allowed(self):
+        game = self.sleeper()
+        nice = game.nice()
+        tuner = CpuTuner(background_names=())
+        with mock.patch.object(cpu_tuner, 'min_allowed_nice', return_value=20):
+            summary = tuner.tune(game.pid, background_pids=[], per_core=[0.0])
+        self.assertIn("priorytet bez zmian", summary)
+        self.assertEqual(game.nice(), nice)
+        tuner.undo()
+
+    def test_find_background_matches_names_with_or_without_exe(self):
+        child = self.sleeper()
+        tuner = CpuTuner(background_names=(child.name().upper() + '.exe',))
+        self.assertIn(child.pid, tuner.find_background())
+        self.assertNotIn(child.pid, tuner.find_background(exclude_pid=child.pid))
+
+    def test_exited_process_is_reported(self):
+        child = spawn_sleeper()
+        child.kill()
+        child.wait()
+        tuner = CpuTuner(background_names=())
+        summary = tuner.tune(child.pid, background_pids=[], per_core=[0.0])
+        self.assertIn("Brak dostępu", summary)
+        self.assertEqual([pid for pid, _ in tuner.errors], [child.pid])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import queue
+import tkinter as tk
+
+
+class UIDispatcher:
+    """Thread-safe, coalescing queue of Tk widget updates drained on the main thread"""
+
+    def __init__(self, root, frame_ms=16, idle_ms=50):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.idle_ms = idle_ms
+        self._queue = queue.SimpleQueue()
+        # Last options applied per widget, used to skip redundant .config() calls
+        self._applied = {}
+        self._after_id = None
+        self._running = False
+        # Optional Instrumentation; flushes are timed as the 'ui_flush' stage
+        self.instrumentation = None
+
+    def start(self):
+        """Start draining the queue from the Tk event loop"""
+        if self._running:
+            return
+        self._running = True
+        self._after_id = self.root.after(self.frame_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def post(self, widget, **options):
+        """Queue a widget.config(**options) call; safe from any thread"""
+        self._queue.put((widget, options))
+
+    def call(self, func, *args):
+        """Queue func(*args) on the main thread; repeated calls to the same func coalesce"""
+        self._queue.put((func, args))
+
+    def _collect(self):
+        """Pull everything queued so far, merging updates per widget"""
+        configs = {}
+        calls = {}
+        while True:
+            try:
+                target, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(payload, dict):
+                configs.setdefault(target, {}).update(payload)
+            else:
+                # Re-insert so the call keeps its latest position in the batch
+                calls.pop(target, None)
+                calls[target] = payload
+        return configs, calls
+
+    def flush(self):
+        """Apply all pending updates now; must be called on the main thread"""
+        instr = self.instrumentation
+        t = instr.begin() if instr is not None else 0
+        configs, calls = self._collect()
+
+        for widget, options in configs.items():
+            applied = self._applied.setdefault(widget, {})
+            changed = {k: v for k, v in options.items() if applied.get(k) != v}
+            if not changed:
+                continue
+            try:
+                widget.config(**changed)
+            except tk.TclError:
+                # Widget was destroyed before the update landed
+                self._applied.pop(widget, None)
+                continue
+            applied.update(changed)
+
+        for func, args in calls.items():
+            try:
+                func(*args)
+            except tk.TclError:
+                continue
+
+        busy = bool(configs or calls)
+        if busy and instr is not None:
+            instr.lap('ui_flush', t)
+        return busy
+
+    def forget(self, widget):
+        """Drop cached state for a widget that is being destroyed"""
+        self._applied.pop(widget, None)
+
+    def _drain(self):
+        if not self._running:
+            return
+        busy = self.flush()
+        # Poll at frame rate while updates are flowing, back off when idle
+        delay = self.frame_ms if busy else self.idle_ms
+        self._after_id = self.root.after(delay, self._drain)